@@ -4,33 +4,60 @@ Document upload and metadata endpoints.
 POST /api/documents/upload  — upload and process a document
 GET  /api/documents/{doc_id} — get document metadata
 GET  /api/documents/         — list recent documents
+DELETE /api/documents/{doc_id} — delete a document and its cached artifacts
 """
 from __future__ import annotations
 
+import asyncio
+import multiprocessing
 import os
-from datetime import datetime
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
+import aiofiles
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select
 
 from ...config import get_settings
 from ...core import (
-    LoadedDocument,
     TierResult,
     allocate,
     budget_as_dict,
     classify,
-    count_tokens,
-    load_document,
+    load_document_path,
+    tiering_token_count,
 )
+from ...core.document_loader import LoadedDocument
 from ...db.database import get_db
 from ...db.models import Document, DocumentChunk
 from ...models.document import DocumentMetadata, TierInfo, TokenBudgetResponse, UploadResponse
+from ...services.document_cache import invalidate_document
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 settings = get_settings()
 
+# Parsing and token counting are CPU-bound; run them in worker processes so
+# they neither hold the GIL nor stall the event loop for other requests.
+# Workers come from a forkserver (spawn where unavailable) rather than a fork
+# of this multi-threaded process, which could copy locks held by other threads;
+# the forkserver imports this module once so each worker starts warm.
+if "forkserver" in multiprocessing.get_all_start_methods():
+    _PARSE_CONTEXT = multiprocessing.get_context("forkserver")
+    _PARSE_CONTEXT.set_forkserver_preload([__name__])
+else:
+    _PARSE_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def _new_parse_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=_PARSE_CONTEXT)
+
+
+_PARSE_POOL = _new_parse_pool()
+
 
 @router.post("/upload", response_model=UploadResponse)
 async def upload_document(
@@ -41,9 +68,8 @@ async def upload_document(
     Upload a document, analyze it, classify into a tier, and store metadata.
     Supported: .txt, .md, .pdf, .docx, .csv, .tsv, .xlsx
     """
-    # Validate file size
-    file_bytes = await file.read()
-    file_size = len(file_bytes)
+    # Validate file size without reading the upload into memory
+    file_size = file.size if file.size is not None else _spooled_size(file.file)
     max_bytes = settings.max_file_size_mb * 1024 * 1024
     if file_size > max_bytes:
         raise HTTPException(
@@ -51,46 +77,58 @@ async def upload_document(
             detail=f"File too large. Max size: {settings.max_file_size_mb}MB"
         )
 
-    # Load and parse document
+    filename = file.filename or "upload"
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    doc_id = str(uuid.uuid4())
+    file_path = os.path.join(settings.upload_dir, f"{doc_id}_{filename}")
+
+    # Stream the spooled upload to disk in 1 MB blocks, then parse and count
+    # tokens from the saved copy in a worker process
+    await asyncio.to_thread(_save_upload, file.file, file_path)
     try:
-        loaded: LoadedDocument = load_document(file_bytes, file.filename or "upload")
+        loaded, token_count, estimated = await _parse_in_pool(file_path, filename)
     except ValueError as e:
+        os.remove(file_path)
         raise HTTPException(status_code=422, detail=str(e))
+    except BrokenProcessPool:
+        os.remove(file_path)
+        raise HTTPException(status_code=422, detail="Document could not be parsed")
+    except BaseException:
+        os.remove(file_path)
+        raise
 
-    # Token counting and tier classification
-    token_count = count_tokens(loaded.raw_text)
+    # Tier classification
     tier_result: TierResult = classify(token_count)
     budget = allocate(token_count)
 
-    # Save file to disk
-    os.makedirs(settings.upload_dir, exist_ok=True)
-    import uuid
-    doc_id = str(uuid.uuid4())
-    file_path = os.path.join(settings.upload_dir, f"{doc_id}_{file.filename}")
-    with open(file_path, "wb") as f:
-        f.write(file_bytes)
-
-    # Persist to database
-    doc = Document(
+    # Persist to database: a Core INSERT ... RETURNING hands back the
+    # server-side created_at without an ORM flush or instance construction
+    stmt = insert(Document).values(
         id=doc_id,
-        filename=file.filename or "upload",
+        filename=filename,
         file_size=file_size,
         token_count=token_count,
+        token_count_estimated=estimated,
         tier=tier_result.tier.value,
         tier_label=tier_result.label,
         mime_type=loaded.mime_type,
         page_count=loaded.page_count,
         row_count=loaded.row_count,
         file_path=file_path,
+    ).returning(Document.created_at)
+    # Save the extracted text (reused by queries), overlapped with the INSERT
+    _, result = await asyncio.gather(
+        _write_upload(parsed_text_path(doc_id), loaded.raw_text.encode("utf-8")),
+        db.execute(stmt),
     )
-    db.add(doc)
-    await db.flush()
+    created_at = result.scalar_one()
 
     return UploadResponse(
         doc_id=doc_id,
         filename=loaded.filename,
         file_size=file_size,
         token_count=token_count,
+        token_count_estimated=estimated,
         tier=TierInfo(
             tier=tier_result.tier.value,
             label=tier_result.label,
@@ -101,10 +139,72 @@ async def upload_document(
         mime_type=loaded.mime_type,
         page_count=loaded.page_count,
         row_count=loaded.row_count,
-        created_at=datetime.utcnow(),
+        created_at=created_at,
     )
 
 
+async def _parse_in_pool(file_path: str, filename: str) -> tuple[LoadedDocument, int, bool]:
+    """
+    Run _parse_and_count in the worker pool. A worker that dies (OOM, a crash
+    in a native parser) breaks the whole pool, so it is replaced and the
+    document retried once; a second failure is blamed on the document.
+    """
+    global _PARSE_POOL
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = _PARSE_POOL
+        try:
+            return await loop.run_in_executor(pool, _parse_and_count, file_path, filename)
+        except BrokenProcessPool:
+            # Concurrent uploads on the same broken pool replace it only once
+            if _PARSE_POOL is pool:
+                logger.warning(f"Parse worker died on {filename}; restarting the pool")
+                _PARSE_POOL = _new_parse_pool()
+                pool.shutdown(wait=False, cancel_futures=True)
+            if attempt:
+                raise
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the parse worker processes (called on application shutdown)."""
+    _PARSE_POOL.shutdown(wait=False, cancel_futures=True)
+
+
+def _parse_and_count(file_path: str, filename: str) -> tuple[LoadedDocument, int, bool]:
+    """
+    Runs in a worker process: extract text and count its tokens in one trip.
+    Returns (document, token_count, is_estimate); see tiering_token_count.
+    """
+    loaded = load_document_path(file_path, filename)
+    return (loaded, *tiering_token_count(loaded.raw_text))
+
+
+def _spooled_size(fileobj) -> int:
+    """Size of a seekable upload file, leaving it rewound."""
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
+def _save_upload(fileobj, file_path: str) -> None:
+    """Copy an upload's spooled file to disk in fixed-size blocks."""
+    fileobj.seek(0)
+    with open(file_path, "wb") as dest:
+        shutil.copyfileobj(fileobj, dest, 1 << 20)
+
+
+def parsed_text_path(doc_id: str) -> str:
+    """Where the text extracted at upload time is stored for a document."""
+    return os.path.join(settings.upload_dir, f"{doc_id}.txt")
+
+
+async def _write_upload(file_path: str, file_bytes: bytes) -> None:
+    """Persist bytes to disk off the event loop."""
+    async with aiofiles.open(file_path, "wb") as f:
+        await f.write(file_bytes)
+
+
 @router.get("/{doc_id}", response_model=DocumentMetadata)
 async def get_document(
     doc_id: str,
@@ -121,6 +221,7 @@ async def get_document(
         filename=doc.filename,
         file_size=doc.file_size,
         token_count=doc.token_count,
+        token_count_estimated=doc.token_count_estimated,
         tier=doc.tier,
         tier_label=doc.tier_label,
         mime_type=doc.mime_type,
@@ -136,22 +237,50 @@ async def list_documents(
     db: AsyncSession = Depends(get_db),
 ) -> list[DocumentMetadata]:
     """List the most recently uploaded documents."""
+    # Column-only select: skips ORM instance construction and identity-map
+    # bookkeeping, and the rows come straight from the DB so validation is skipped.
     result = await db.execute(
-        select(Document).order_by(Document.created_at.desc()).limit(limit)
-    )
-    docs = result.scalars().all()
-    return [
-        DocumentMetadata(
-            doc_id=doc.id,
-            filename=doc.filename,
-            file_size=doc.file_size,
-            token_count=doc.token_count,
-            tier=doc.tier,
-            tier_label=doc.tier_label,
-            mime_type=doc.mime_type,
-            page_count=doc.page_count,
-            row_count=doc.row_count,
-            created_at=doc.created_at,
+        select(
+            Document.id.label("doc_id"),
+            Document.filename,
+            Document.file_size,
+            Document.token_count,
+            Document.token_count_estimated,
+            Document.tier,
+            Document.tier_label,
+            Document.mime_type,
+            Document.page_count,
+            Document.row_count,
+            Document.created_at,
         )
-        for doc in docs
-    ]
+        .order_by(Document.created_at.desc())
+        .limit(limit)
+    )
+    return [DocumentMetadata.model_construct(**row) for row in result.mappings().all()]
+
+
+@router.delete("/{doc_id}", status_code=204)
+async def delete_document(
+    doc_id: str,
+    db: AsyncSession = Depends(get_db),
+) -> None:
+    """Delete a document, its stored files, and every cached RAG index for it."""
+    result = await db.execute(
+        delete(Document).where(Document.id == doc_id).returning(Document.file_path)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Document {doc_id} not found")
+    # Commit before touching files or caches: if the DELETE fails, the row
+    # must still point at intact files
+    await db.commit()
+
+    for path in (row.file_path, parsed_text_path(doc_id)):
+        if not path:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    await invalidate_document(doc_id)
@@ -5,10 +5,14 @@ POST /api/query
 """
 from __future__ import annotations
 
+import asyncio
+import mmap
 import os
-import pickle
+from typing import Optional
 
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException
+from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -20,19 +24,36 @@ from ...core import (
     assemble,
     budget_as_dict,
     classify,
-    load_document,
+    load_document_path,
     split_into_chunks,
 )
 from ...core.tier_classifier import Tier
 from ...db.database import get_db
 from ...db.models import Document
 from ...models.document import ChunkInfo, QueryRequest, QueryResponse, TokenBudgetResponse
+from ...services.document_cache import (
+    async_redis,
+    invalidate_document,
+    is_deleted,
+    rag_cache,
+    rag_reader,
+    semantic_cache,
+)
+from .documents import parsed_text_path
 
 router = APIRouter(prefix="/query", tags=["query"])
 settings = get_settings()
 
-# In-memory cache: doc_id → RAGPipeline (for T4 documents within same process)
-_rag_cache: dict[str, RAGPipeline] = {}
+# Settings read on every query, bound once at import
+_REDIS_TTL = settings.redis_cache_ttl
+_CHUNK_TARGET = settings.chunk_target_tokens
+_CHUNK_OVERLAP = settings.chunk_overlap_tokens
+_SEMANTIC_CACHE_ENABLED = settings.semantic_cache_enabled
+
+# Embedder for semantic query-cache keys (model loaded on first use)
+_query_embedder = RAGPipeline()
+# Set after the first failed embedder load so later queries don't retry it
+_query_embedder_failed = False
 
 
 @router.post("/", response_model=QueryResponse)
@@ -56,39 +77,42 @@ async def query_document(
             detail="Document file no longer available. Please re-upload."
         )
 
-    # Re-load raw text from disk
-    with open(doc.file_path, "rb") as f:
-        file_bytes = f.read()
+    tier = Tier(doc.tier)
 
-    try:
-        loaded = load_document(file_bytes, doc.filename)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to re-parse document: {e}")
+    # Near-identical questions on T4 documents reuse the previous response
+    query_vec = None
+    if _semantic_cache_applies(tier):
+        # Embedding and sync Redis calls run off the event loop
+        query_vec, cached = await asyncio.to_thread(_semantic_cache_lookup, request)
+        if cached is not None:
+            return cached
 
-    tier = Tier(doc.tier)
-    tier_result = TierResult(
-        tier=tier,
-        token_count=doc.token_count,
-        label=doc.tier_label,
-        color="#000000",
-        description="",
-    )
+    # Text extracted at upload time; documents without it are re-parsed
+    raw_text = _read_parsed_text(request.doc_id)
+    if raw_text is None:
+        try:
+            raw_text = load_document_path(doc.file_path, doc.filename).raw_text
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to re-parse document: {e}")
+
+    tier_result = TierResult(tier=tier, token_count=doc.token_count, label=doc.tier_label)
 
     # For T4, get or build RAG pipeline
     rag_pipeline = None
     if tier == Tier.T4:
-        rag_pipeline = _get_or_build_rag(request.doc_id, loaded.raw_text)
+        rag_pipeline = await _get_or_build_rag(request.doc_id, raw_text)
 
     # Assemble context
     ctx = assemble(
-        raw_text=loaded.raw_text,
+        raw_text=raw_text,
         tier_result=tier_result,
         query=request.query,
         rag_pipeline=rag_pipeline,
         top_k=request.top_k,
+        query_vec=query_vec,   # already embedded for the cache lookup
     )
 
-    return QueryResponse(
+    response = QueryResponse(
         doc_id=request.doc_id,
         query=request.query,
         tier=tier.value,
@@ -99,37 +123,149 @@ async def query_document(
         budget=TokenBudgetResponse(**budget_as_dict(ctx.budget)),
     )
 
+    if query_vec is not None:
+        await asyncio.to_thread(_semantic_cache_store, request, query_vec, response)
+        await _drop_if_deleted(request.doc_id)
+    return response
+
+
+def _read_parsed_text(doc_id: str) -> Optional[str]:
+    """Return the cached extracted text for a document, or None if absent."""
+    path = parsed_text_path(doc_id)
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return str(mm, "utf-8")
+    except FileNotFoundError:
+        return None
+
+
+def _semantic_cache_applies(tier: Tier) -> bool:
+    """
+    Only T4 queries use the cache: retrieval needs the query embedding anyway,
+    whereas on T3 (BM25) embedding the query would cost more than a cache hit saves.
+    """
+    return _SEMANTIC_CACHE_ENABLED and not _query_embedder_failed and tier == Tier.T4
+
+
+def _embed_query(query: str) -> Optional[np.ndarray]:
+    """Embed a query for the semantic cache, or None if no embedder is available."""
+    global _query_embedder_failed
+    if _query_embedder_failed:
+        return None
+    if not _query_embedder.embedder_loaded:
+        try:
+            _query_embedder.load_embedder()
+        except Exception as e:
+            # No model to load: stop trying for the life of the process
+            _query_embedder_failed = True
+            logger.warning(f"Semantic query cache disabled, embedder unavailable: {e}")
+            return None
+    try:
+        return _query_embedder.embed_query(query)
+    except Exception as e:
+        # Transient (rate limit, network): skip the cache for this query only
+        logger.warning(f"Query embedding failed, skipping semantic cache: {e}")
+        return None
+
+
+def _semantic_cache_lookup(
+    request: QueryRequest,
+) -> tuple[Optional[np.ndarray], Optional[QueryResponse]]:
+    """Embed the query and return (query_vec, cached response or None)."""
+    query_vec = _embed_query(request.query)
+    if query_vec is None:
+        return None, None
+
+    try:
+        cached = semantic_cache().lookup(request.doc_id, request.top_k, query_vec)
+    except Exception:
+        return query_vec, None  # Redis unavailable
+
+    if cached is None:
+        return query_vec, None
+    response = QueryResponse.model_validate_json(cached)
+    return query_vec, response.model_copy(update={"query": request.query})
+
+
+def _semantic_cache_store(request: QueryRequest, query_vec: np.ndarray, response: QueryResponse) -> None:
+    try:
+        semantic_cache().store(request.doc_id, request.top_k, query_vec, response.model_dump_json())
+    except Exception:
+        pass
+
+
+def warm_up() -> None:
+    """Load the query-time tokenizers and models ahead of the first query."""
+    # A small T3 assembly loads the sentence splitter, tokenizer and BM25, and
+    # compiles the budget-fill loop
+    assemble(
+        raw_text="Warm up the tokenizers. Sentence splitting and token counting.",
+        tier_result=TierResult(tier=Tier.T3, token_count=0, label=""),
+        query="warm up",
+    )
+    if _SEMANTIC_CACHE_ENABLED:
+        _embed_query("warm up")
+
 
-def _get_or_build_rag(doc_id: str, raw_text: str) -> RAGPipeline:
+async def _get_or_build_rag(doc_id: str, raw_text: str) -> RAGPipeline:
     """Return cached RAG pipeline or build a new one."""
-    if doc_id in _rag_cache:
-        return _rag_cache[doc_id]
+    pipeline = rag_cache.get(doc_id)
+    if pipeline is not None:
+        return pipeline
+
+    # Disk reloads, (de)serialization and LRU spills run off the event loop
+    pipeline = await asyncio.to_thread(rag_cache.get_spilled, doc_id)
+    if pipeline is not None:
+        await _drop_if_deleted(doc_id)
+        return pipeline
 
     # Try Redis cache
     try:
-        import redis as redis_lib
-        r = redis_lib.from_url(settings.redis_url)
-        cached = r.get(f"rag:{doc_id}")
-        if cached:
-            pipeline = RAGPipeline.deserialize(cached)
-            _rag_cache[doc_id] = pipeline
+        index_bytes, meta_bytes = await asyncio.gather(
+            rag_reader.get(f"rag:{doc_id}:index"),
+            rag_reader.get(f"rag:{doc_id}:meta"),
+        )
+        if index_bytes and meta_bytes:
+            pipeline = await asyncio.to_thread(RAGPipeline.deserialize, index_bytes, meta_bytes)
+            await asyncio.to_thread(rag_cache.put, doc_id, pipeline)
+            await _drop_if_deleted(doc_id)
             return pipeline
     except Exception:
         pass  # Redis unavailable, build fresh
 
-    # Build fresh pipeline
-    chunks = split_into_chunks(raw_text, target_tokens=settings.chunk_target_tokens,
-                               overlap_tokens=settings.chunk_overlap_tokens)
-    pipeline = RAGPipeline()
-    pipeline.build_index(chunks)
+    # Build fresh pipeline (chunking + embedding) off the event loop
+    pipeline = await asyncio.to_thread(_build_rag, raw_text)
 
     # Cache in Redis
     try:
-        import redis as redis_lib
-        r = redis_lib.from_url(settings.redis_url)
-        r.setex(f"rag:{doc_id}", settings.redis_cache_ttl, pipeline.serialize())
+        index_bytes, meta_bytes = await asyncio.to_thread(pipeline.serialize)
+        pipe = async_redis.pipeline(transaction=False)
+        pipe.setex(f"rag:{doc_id}:index", _REDIS_TTL, index_bytes)
+        pipe.setex(f"rag:{doc_id}:meta", _REDIS_TTL, meta_bytes)
+        await pipe.execute()
     except Exception:
         pass
 
-    _rag_cache[doc_id] = pipeline
+    await asyncio.to_thread(rag_cache.put, doc_id, pipeline)
+    await _drop_if_deleted(doc_id)
+    return pipeline
+
+
+def _build_rag(raw_text: str) -> RAGPipeline:
+    chunks = split_into_chunks(raw_text, target_tokens=_CHUNK_TARGET,
+                               overlap_tokens=_CHUNK_OVERLAP)
+    pipeline = RAGPipeline()
+    pipeline.build_index(chunks)
     return pipeline
+
+
+async def _drop_if_deleted(doc_id: str) -> None:
+    """
+    Undo caching for a document deleted while this query was in flight:
+    the delete's invalidation may have run before our put/setex/store.
+    """
+    if is_deleted(doc_id):
+        await invalidate_document(doc_id)
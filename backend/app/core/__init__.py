@@ -1,7 +1,9 @@
-from .document_loader import load_document, LoadedDocument
+from .document_loader import load_document, load_document_path, LoadedDocument
 from .token_estimator import count_tokens, estimate_tokens_from_bytes
-from .tier_classifier import classify, Tier, TierResult
+from .tier_classifier import classify, tiering_token_count, Tier, TierResult
 from .budget_allocator import allocate, TokenBudget, budget_as_dict
 from .chunking_engine import split_into_chunks, trim_boilerplate, Chunk
-from .rag_pipeline import RAGPipeline, bm25_rank_chunks, RetrievedChunk
+from .rag_pipeline import RAGPipeline, bm25_rank_chunks, RetrievalResult
 from .context_assembler import assemble, AssembledContext
+from .query_cache import SemanticQueryCache
+from .pipeline_cache import RAGPipelineCache
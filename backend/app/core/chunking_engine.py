@@ -10,6 +10,7 @@ Strategy:
 from __future__ import annotations
 
 import re
+import threading
 from dataclasses import dataclass, field
 from typing import Optional
 
@@ -24,9 +25,44 @@ _BOILERPLATE_PATTERNS = [
     re.compile(r"^\s*\d+\s*$", re.MULTILINE),                  # bare page numbers
     re.compile(r"^(header|footer|copyright|all rights reserved).*$", re.IGNORECASE | re.MULTILINE),
     re.compile(r"^[-=_*]{5,}\s*$", re.MULTILINE),              # horizontal rules
-    re.compile(r"\n{3,}", re.MULTILINE),                        # excessive blank lines → double newline
 ]
 
+# All deletion patterns fused into one alternation so the text is scanned once
+_BOILERPLATE_COMBINED = re.compile(
+    "|".join(f"(?:{p.pattern})" for p in _BOILERPLATE_PATTERNS),
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def _compile_hyperscan_db():
+    """
+    Compile the deletion patterns into one Hyperscan database, or return None
+    if hyperscan isn't installed. The database is used on ASCII text only, so
+    \\s is spelled out as the ASCII characters Python's str \\s matches.
+    """
+    try:
+        import hyperscan
+    except ImportError:
+        return None
+
+    ascii_space = r"[\t\n\x0b\x0c\r\x1c-\x1f ]"
+    expressions = [p.pattern.replace(r"\s", ascii_space).encode() for p in _BOILERPLATE_PATTERNS]
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    db.compile(
+        expressions=expressions,
+        ids=list(range(len(expressions))),
+        elements=len(expressions),
+        flags=hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_SOM_LEFTMOST,
+    )
+    return db
+
+
+_HS_DB = _compile_hyperscan_db()
+
+# Whitespace normalization for trimmed text
+_SPACE_RUNS = re.compile(r"[ \t]{2,}|\t")
+_BLANK_LINE_RUNS = re.compile(r"\n{3,}")
+
 # Section header pattern (markdown ## style or ALL CAPS lines)
 _SECTION_HEADER = re.compile(
     r"^(#{1,6}\s+.+|[A-Z][A-Z\s]{4,}[A-Z])$",
@@ -49,21 +85,62 @@ def trim_boilerplate(text: str) -> str:
     Tier-2 strategy: remove common boilerplate and compress whitespace.
     Returns cleaned text.
     """
-    for pattern in _BOILERPLATE_PATTERNS:
-        if pattern.pattern == r"\n{3,}":
-            text = pattern.sub("\n\n", text)
-        else:
-            text = pattern.sub("", text)
+    text = _remove_boilerplate(text)
 
-    # Collapse multiple spaces (but not newlines)
-    text = re.sub(r"[ \t]+", " ", text)
-    # Remove trailing spaces on each line
-    text = "\n".join(line.rstrip() for line in text.splitlines())
+    # Collapse multiple spaces (but not newlines); single spaces are left untouched
+    text = _SPACE_RUNS.sub(" ", text)
+    # Remove trailing spaces on each line, then cap blank runs at one empty line
+    text = "\n".join([line.rstrip() for line in text.splitlines()])
+    text = _BLANK_LINE_RUNS.sub("\n\n", text)
     text = text.strip()
     logger.debug(f"Boilerplate trim: {len(text):,} chars remaining")
     return text
 
 
+def _remove_boilerplate(text: str) -> str:
+    """
+    Delete boilerplate matches; same result as _BOILERPLATE_COMBINED.sub("", text).
+
+    With Hyperscan, one scan over the text finds the regions that can contain a
+    match, and the regex only runs inside those regions. Every pattern ends in
+    $, so each region ends where $ holds, and bounding the search there with
+    endpos doesn't change what the regex matches.
+    """
+    if _HS_DB is None or not text.isascii():
+        return _BOILERPLATE_COMBINED.sub("", text)
+
+    hits: list[tuple[int, int]] = []
+    _HS_DB.scan(
+        text.encode("ascii"),
+        match_event_handler=lambda _id, start, end, _flags, ctx: ctx.append((start, end)),
+        context=hits,
+    )
+    if not hits:
+        return text
+
+    # Merge overlapping hits into regions
+    hits.sort()
+    regions: list[list[int]] = []
+    for start, end in hits:
+        if regions and start < regions[-1][1]:
+            regions[-1][1] = max(regions[-1][1], end)
+        else:
+            regions.append([start, end])
+
+    pieces: list[str] = []
+    pos = 0
+    for start, end in regions:
+        search_from = max(start, pos)
+        while search_from < end:
+            m = _BOILERPLATE_COMBINED.search(text, search_from, end)
+            if m is None:
+                break
+            pieces.append(text[pos:m.start()])
+            pos = search_from = m.end()
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+
 def split_into_chunks(
     text: str,
     target_tokens: int = 512,
@@ -77,102 +154,128 @@ def split_into_chunks(
     if not sentences:
         return []
 
-    sentence_tokens = count_tokens_batch(sentences)
+    sentence_tokens = count_tokens_batch([sent for sent, _, _ in sentences])
     chunks: list[Chunk] = []
-    current_sentences: list[str] = []
+    current: list[int] = []   # indices into sentences
     current_tokens = 0
-    chunk_idx = 0
-    char_offset = 0
 
-    for sent, tok_count in zip(sentences, sentence_tokens):
+    for i, tok_count in enumerate(sentence_tokens):
         # If a single sentence exceeds target, emit it alone
-        if tok_count > target_tokens and not current_sentences:
-            start = text.find(sent, char_offset)
-            chunks.append(Chunk(
-                index=chunk_idx,
-                text=sent,
-                token_count=tok_count,
-                start_char=start,
-                end_char=start + len(sent),
-            ))
-            chunk_idx += 1
-            char_offset = start + len(sent)
+        if tok_count > target_tokens and not current:
+            chunks.append(_make_chunk(len(chunks), sentences, [i], tok_count))
             continue
 
-        if current_tokens + tok_count > target_tokens and current_sentences:
-            chunk_text = " ".join(current_sentences)
-            start = text.find(current_sentences[0], char_offset)
-            chunks.append(Chunk(
-                index=chunk_idx,
-                text=chunk_text,
-                token_count=current_tokens,
-                start_char=start,
-                end_char=start + len(chunk_text),
-            ))
-            chunk_idx += 1
+        if current_tokens + tok_count > target_tokens and current:
+            chunks.append(_make_chunk(len(chunks), sentences, current, current_tokens))
 
             # Overlap: keep last N tokens worth of sentences
-            overlap_sents, overlap_toks = _get_overlap_sentences(
-                current_sentences, sentence_tokens, overlap_tokens
+            current, current_tokens = _get_overlap_sentences(
+                current, sentence_tokens, overlap_tokens
             )
-            current_sentences = overlap_sents
-            current_tokens = overlap_toks
-            char_offset = start + len(chunk_text)
 
-        current_sentences.append(sent)
+        current.append(i)
         current_tokens += tok_count
 
     # Flush remaining
-    if current_sentences:
-        chunk_text = " ".join(current_sentences)
-        start = text.find(current_sentences[0], char_offset)
-        chunks.append(Chunk(
-            index=chunk_idx,
-            text=chunk_text,
-            token_count=current_tokens,
-            start_char=max(0, start),
-            end_char=max(0, start) + len(chunk_text),
-        ))
+    if current:
+        chunks.append(_make_chunk(len(chunks), sentences, current, current_tokens))
 
     logger.info(f"Chunking: {len(sentences)} sentences → {len(chunks)} chunks "
                 f"(target={target_tokens} tokens, overlap={overlap_tokens})")
     return chunks
 
 
-def _sentence_tokenize(text: str) -> list[str]:
-    """Tokenize text into sentences using NLTK punkt, with paragraph fallback."""
-    try:
-        import nltk
-        try:
-            tokenizer = nltk.data.load("tokenizers/punkt_tab/english.pickle")
-        except (LookupError, OSError):
+def _make_chunk(
+    index: int,
+    sentences: list[tuple[str, int, int]],
+    members: list[int],
+    token_count: int,
+) -> Chunk:
+    """Build a Chunk from sentence indices; offsets come straight from the spans."""
+    return Chunk(
+        index=index,
+        text=" ".join(sentences[i][0] for i in members),
+        token_count=token_count,
+        start_char=sentences[members[0]][1],
+        end_char=sentences[members[-1]][2],
+    )
+
+
+_punkt_lock = threading.Lock()
+_punkt_tokenizer = None
+
+
+def _get_punkt_tokenizer():
+    """Load the NLTK punkt tokenizer once per process (downloading it if needed)."""
+    global _punkt_tokenizer
+    if _punkt_tokenizer is not None:
+        return _punkt_tokenizer
+
+    with _punkt_lock:
+        if _punkt_tokenizer is None:
+            import nltk
             try:
-                tokenizer = nltk.data.load("tokenizers/punkt/english.pickle")
+                tokenizer = nltk.data.load("tokenizers/punkt_tab/english.pickle")
             except (LookupError, OSError):
-                nltk.download("punkt", quiet=True)
-                nltk.download("punkt_tab", quiet=True)
                 try:
-                    tokenizer = nltk.data.load("tokenizers/punkt_tab/english.pickle")
-                except (LookupError, OSError):
                     tokenizer = nltk.data.load("tokenizers/punkt/english.pickle")
-        sentences = tokenizer.tokenize(text)
-        return [s.strip() for s in sentences if s.strip()]
+                except (LookupError, OSError):
+                    nltk.download("punkt", quiet=True)
+                    nltk.download("punkt_tab", quiet=True)
+                    try:
+                        tokenizer = nltk.data.load("tokenizers/punkt_tab/english.pickle")
+                    except (LookupError, OSError):
+                        tokenizer = nltk.data.load("tokenizers/punkt/english.pickle")
+            _punkt_tokenizer = tokenizer
+    return _punkt_tokenizer
+
+
+def _sentence_tokenize(text: str) -> list[tuple[str, int, int]]:
+    """
+    Tokenize text into (sentence, start_char, end_char) using NLTK punkt spans,
+    with paragraph fallback.
+    """
+    try:
+        spans = list(_get_punkt_tokenizer().span_tokenize(text))
     except Exception as e:
         logger.warning(f"NLTK tokenizer failed ({e}), falling back to paragraph split")
-        return [p.strip() for p in re.split(r"\n\n+", text) if p.strip()]
+        spans = _paragraph_spans(text)
+    return [s for s in (_strip_span(text, start, end) for start, end in spans) if s]
+
+
+def _paragraph_spans(text: str) -> list[tuple[int, int]]:
+    """Spans of the blocks separated by blank lines."""
+    spans = []
+    pos = 0
+    for m in re.finditer(r"\n\n+", text):
+        spans.append((pos, m.start()))
+        pos = m.end()
+    spans.append((pos, len(text)))
+    return spans
+
+
+def _strip_span(text: str, start: int, end: int) -> Optional[tuple[str, int, int]]:
+    """Return the whitespace-stripped span as (text, start, end), or None if blank."""
+    raw = text[start:end]
+    stripped = raw.strip()
+    if not stripped:
+        return None
+    start += len(raw) - len(raw.lstrip())
+    return stripped, start, start + len(stripped)
 
 
 def _get_overlap_sentences(
-    sentences: list[str],
+    members: list[int],
     token_counts: list[int],
     overlap_tokens: int,
-) -> tuple[list[str], int]:
-    """Return the trailing sentences that together fit within overlap_tokens."""
-    overlap_sents = []
+) -> tuple[list[int], int]:
+    """Return the trailing sentence indices that together fit within overlap_tokens."""
+    overlap: list[int] = []
     overlap_toks = 0
-    for sent, toks in zip(reversed(sentences), reversed(token_counts)):
-        if overlap_toks + toks > overlap_tokens:
+    for i in reversed(members):
+        if overlap_toks + token_counts[i] > overlap_tokens:
             break
-        overlap_sents.insert(0, sent)
-        overlap_toks += toks
-    return overlap_sents, overlap_toks
+        overlap.append(i)
+        overlap_toks += token_counts[i]
+    overlap.reverse()
+    return overlap, overlap_toks
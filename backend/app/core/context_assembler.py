@@ -9,14 +9,67 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Optional
 
+import numpy as np
 from loguru import logger
 
 from .budget_allocator import TokenBudget, allocate
 from .chunking_engine import Chunk, Chunk, split_into_chunks, trim_boilerplate
-from .rag_pipeline import RAGPipeline, RetrievedChunk, bm25_rank_chunks
+from .rag_pipeline import RAGPipeline, RetrievalResult, bm25_rank_chunks
 from .tier_classifier import Tier, TierResult
 from .token_estimator import count_tokens, truncate_to_tokens
 
+_CHUNK_SEPARATOR = "\n\n---\n\n"
+
+
+def _budget_prefix(token_counts: np.ndarray, doc_max: int) -> int:
+    """
+    Length of the longest prefix of token_counts whose running sum stays
+    within doc_max (the greedy budget fill shared by T3 and T4).
+
+    Runs a numba-compiled loop when numba is installed. It is compiled on the
+    first call (and cached on disk between runs), so importing this module
+    doesn't pay for numba.
+    """
+    global _budget_prefix_impl
+    if _budget_prefix_impl is None:
+        _budget_prefix_impl = _compile_budget_prefix()
+    return _budget_prefix_impl(token_counts, doc_max)
+
+
+def _budget_prefix_loop(token_counts: np.ndarray, doc_max: int) -> int:
+    # Indexes the array directly, the form numba compiles to a native loop
+    used = 0
+    n = 0
+    for i in range(token_counts.shape[0]):
+        if used + token_counts[i] > doc_max:
+            break
+        used += token_counts[i]
+        n += 1
+    return n
+
+
+def _budget_prefix_py(token_counts: np.ndarray, doc_max: int) -> int:
+    # Without numba, iterate Python ints: indexing numpy scalars is ~5x slower
+    used = 0
+    n = 0
+    for count in token_counts.tolist():
+        if used + count > doc_max:
+            break
+        used += count
+        n += 1
+    return n
+
+
+_budget_prefix_impl = None
+
+
+def _compile_budget_prefix():
+    try:
+        from numba import njit
+    except ImportError:
+        return _budget_prefix_py
+    return njit(cache=True)(_budget_prefix_loop)
+
 
 @dataclass
 class AssembledContext:
@@ -34,25 +87,17 @@ def assemble(
     query: Optional[str] = None,
     rag_pipeline: Optional[RAGPipeline] = None,
     top_k: int = 10,
+    query_vec: Optional[np.ndarray] = None,
 ) -> AssembledContext:
     """
     Main entry point. Returns an AssembledContext for the given tier.
+    query_vec, if the caller has already embedded the query, saves T4 a second embedding.
     """
-    tier = tier_result.tier
-
-    if tier == Tier.T1:
-        return _assemble_t1(raw_text, tier_result)
-
-    elif tier == Tier.T2:
-        return _assemble_t2(raw_text, tier_result)
-
-    elif tier == Tier.T3:
-        return _assemble_t3(raw_text, tier_result, query or "", top_k)
-
-    elif tier == Tier.T4:
-        return _assemble_t4(raw_text, tier_result, query or "", rag_pipeline, top_k)
-
-    raise ValueError(f"Unknown tier: {tier}")
+    try:
+        entry = _TIER_DISPATCH[tier_result.tier]
+    except KeyError:
+        raise ValueError(f"Unknown tier: {tier_result.tier}") from None
+    return entry(raw_text, tier_result, query or "", rag_pipeline, top_k, query_vec)
 
 
 # ------------------------------------------------------------------
@@ -63,13 +108,15 @@ def _assemble_t1(raw_text: str, tier_result: TierResult) -> AssembledContext:
     token_count = count_tokens(raw_text)
     budget = allocate(token_count)
     # Safety truncation (shouldn't be needed for T1, but just in case)
-    text = truncate_to_tokens(raw_text, budget.document_max)
+    text, final_tokens = raw_text, token_count
+    if token_count > budget.document_max:
+        text, final_tokens = truncate_to_tokens(raw_text, budget.document_max)
 
     logger.info(f"T1 assembly: {token_count:,} tokens, no processing")
     return AssembledContext(
         tier=Tier.T1,
         assembled_text=text,
-        token_count=count_tokens(text),
+        token_count=final_tokens,
         budget=budget,
         strategy_notes="Full document injected without modification.",
     )
@@ -84,8 +131,9 @@ def _assemble_t2(raw_text: str, tier_result: TierResult) -> AssembledContext:
     trimmed = trim_boilerplate(raw_text)
     trimmed_tokens = count_tokens(trimmed)
     budget = allocate(trimmed_tokens)
-    text = truncate_to_tokens(trimmed, budget.document_max)
-    final_tokens = count_tokens(text)
+    text, final_tokens = trimmed, trimmed_tokens
+    if trimmed_tokens > budget.document_max:
+        text, final_tokens = truncate_to_tokens(trimmed, budget.document_max)
 
     saved = original_tokens - final_tokens
     logger.info(f"T2 assembly: {original_tokens:,} → {final_tokens:,} tokens (saved {saved:,})")
@@ -119,39 +167,28 @@ def _assemble_t3(
         ranked = bm25_rank_chunks(chunks, query, top_k=min(top_k * 2, len(chunks)))
     else:
         # No query: return first N chunks that fit budget
-        ranked = [
-            type("RC", (), {"chunk": c, "score": 1.0, "rank": i + 1})()
-            for i, c in enumerate(chunks)
-        ]
+        ranked = RetrievalResult.from_chunks(chunks, np.ones(len(chunks), dtype=np.float32))
 
     # Greedy fill within document budget
-    selected_chunks: list[RetrievedChunk] = []
-    used_tokens = 0
-    for rc in ranked:
-        if used_tokens + rc.chunk.token_count > DOCUMENT_MAX:
-            break
-        selected_chunks.append(rc)
-        used_tokens += rc.chunk.token_count
+    n_selected = _budget_prefix(ranked.token_counts, DOCUMENT_MAX)
+    used_tokens = int(ranked.token_counts[:n_selected].sum())
 
     # Sort selected chunks back into document order
-    selected_chunks.sort(key=lambda rc: rc.chunk.index)
+    selected = ranked.take(np.argsort(ranked.indices[:n_selected], kind="stable"))
 
-    assembled = "\n\n---\n\n".join(rc.chunk.text for rc in selected_chunks)
+    assembled = _join_chunks(selected.texts)
     budget = allocate(used_tokens)
 
-    logger.info(f"T3 assembly: {len(chunks)} chunks → {len(selected_chunks)} selected, {used_tokens:,} tokens")
+    logger.info(f"T3 assembly: {len(chunks)} chunks → {len(selected)} selected, {used_tokens:,} tokens")
     return AssembledContext(
         tier=Tier.T3,
         assembled_text=assembled,
         token_count=used_tokens,
         budget=budget,
-        chunks_used=[
-            {"index": rc.chunk.index, "tokens": rc.chunk.token_count, "score": round(rc.score, 4)}
-            for rc in selected_chunks
-        ],
+        chunks_used=_chunks_used(selected),
         strategy_notes=(
             f"Document split into {len(chunks)} chunks. "
-            f"Top {len(selected_chunks)} selected via BM25 ranking ({used_tokens:,} tokens)."
+            f"Top {len(selected)} selected via BM25 ranking ({used_tokens:,} tokens)."
         ),
     )
 
@@ -166,6 +203,7 @@ def _assemble_t4(
     query: str,
     rag_pipeline: Optional[RAGPipeline],
     top_k: int,
+    query_vec: Optional[np.ndarray] = None,
 ) -> AssembledContext:
     from .budget_allocator import DOCUMENT_MAX
 
@@ -176,27 +214,21 @@ def _assemble_t4(
         rag_pipeline.build_index(chunks)
 
     if query.strip():
-        retrieved = rag_pipeline.retrieve(query, top_k=top_k)
+        retrieved = rag_pipeline.retrieve(query, top_k=top_k, query_vec=query_vec)
     else:
         # No query: return first top_k chunks
-        retrieved = [
-            RetrievedChunk(chunk=c, score=1.0, rank=i + 1)
-            for i, c in enumerate(rag_pipeline._chunks[:top_k])
-        ]
+        first = rag_pipeline._chunks[:top_k]
+        retrieved = RetrievalResult.from_chunks(first, np.ones(len(first), dtype=np.float32))
 
     # Sort by document order
-    retrieved.sort(key=lambda rc: rc.chunk.index)
+    retrieved = retrieved.take(np.argsort(retrieved.indices, kind="stable"))
 
     # Greedy fill
-    selected: list[RetrievedChunk] = []
-    used_tokens = 0
-    for rc in retrieved:
-        if used_tokens + rc.chunk.token_count > DOCUMENT_MAX:
-            break
-        selected.append(rc)
-        used_tokens += rc.chunk.token_count
+    n_selected = _budget_prefix(retrieved.token_counts, DOCUMENT_MAX)
+    used_tokens = int(retrieved.token_counts[:n_selected].sum())
+    selected = retrieved.take(np.arange(n_selected))
 
-    assembled = "\n\n---\n\n".join(rc.chunk.text for rc in selected)
+    assembled = _join_chunks(selected.texts)
     budget = allocate(used_tokens)
 
     logger.info(f"T4 assembly: retrieved {len(retrieved)} → {len(selected)} chunks, {used_tokens:,} tokens")
@@ -205,12 +237,55 @@ def _assemble_t4(
         assembled_text=assembled,
         token_count=used_tokens,
         budget=budget,
-        chunks_used=[
-            {"index": rc.chunk.index, "tokens": rc.chunk.token_count, "score": round(rc.score, 4)}
-            for rc in selected
-        ],
+        chunks_used=_chunks_used(selected),
         strategy_notes=(
             f"Vector similarity search retrieved {len(retrieved)} chunks. "
             f"{len(selected)} fit within token budget ({used_tokens:,} tokens)."
         ),
     )
+
+
+def _join_chunks(texts: list[str]) -> str:
+    """
+    Join chunk texts with the separator. str.join over a list sizes the
+    result in one pass and copies each string once, so no pre-sizing is needed.
+    """
+    return _CHUNK_SEPARATOR.join(texts)
+
+
+# ------------------------------------------------------------------
+# Dispatch — entry wrappers share one signature and drop unused args
+# ------------------------------------------------------------------
+
+def _assemble_t1_entry(raw_text, tier_result, query, rag_pipeline, top_k, query_vec):
+    return _assemble_t1(raw_text, tier_result)
+
+
+def _assemble_t2_entry(raw_text, tier_result, query, rag_pipeline, top_k, query_vec):
+    return _assemble_t2(raw_text, tier_result)
+
+
+def _assemble_t3_entry(raw_text, tier_result, query, rag_pipeline, top_k, query_vec):
+    return _assemble_t3(raw_text, tier_result, query, top_k)
+
+
+def _assemble_t4_entry(raw_text, tier_result, query, rag_pipeline, top_k, query_vec):
+    return _assemble_t4(raw_text, tier_result, query, rag_pipeline, top_k, query_vec)
+
+
+_TIER_DISPATCH = {
+    Tier.T1: _assemble_t1_entry,
+    Tier.T2: _assemble_t2_entry,
+    Tier.T3: _assemble_t3_entry,
+    Tier.T4: _assemble_t4_entry,
+}
+
+
+def _chunks_used(selected: RetrievalResult) -> list[dict]:
+    """Per-chunk metadata for the API response."""
+    return [
+        {"index": index, "tokens": tokens, "score": round(score, 4)}
+        for index, tokens, score in zip(
+            selected.indices.tolist(), selected.token_counts.tolist(), selected.scores.tolist()
+        )
+    ]
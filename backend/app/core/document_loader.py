@@ -3,11 +3,14 @@ Document Loader — reads .txt, .md, .pdf, .docx, .csv and returns raw text + me
 """
 from __future__ import annotations
 
+import codecs
+import csv
 import io
 import os
+import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 from loguru import logger
 
@@ -22,119 +25,277 @@ class LoadedDocument:
     row_count: Optional[int] = None    # CSVs only
 
 
+# Bytes of a non-UTF-8 text file handed to chardet
+_ENCODING_SNIFF_BYTES = 64 * 1024
+_MIN_ENCODING_CONFIDENCE = 0.2
+_NON_ASCII_BYTE = re.compile(rb"[\x80-\xff]")
+
+# CSV delimiter detection: sample size and the delimiters the sniffer may pick
+_CSV_SNIFF_BYTES = 2048
+_CSV_DELIMITERS = ",\t;|"
+_CSV_SNIFFER = csv.Sniffer()
+
 SUPPORTED_EXTENSIONS = {".txt", ".md", ".pdf", ".docx", ".csv", ".tsv", ".xlsx"}
 
+# Parsers accept raw bytes, or a path the underlying library opens itself
+_Source = Union[bytes, str]
+
 
 def load_document(file_bytes: bytes, filename: str) -> LoadedDocument:
     """
     Load a document from raw bytes and return a LoadedDocument.
     Dispatches to the appropriate parser based on file extension.
     """
+    return _load(file_bytes, filename, len(file_bytes))
+
+
+def load_document_path(path: str, filename: str) -> LoadedDocument:
+    """
+    Load a document already on disk. PDF, DOCX and tabular files are opened
+    by path, so the file never has to be held in memory as one bytes object.
+    """
+    return _load(path, filename, os.path.getsize(path))
+
+
+def _load(source: _Source, filename: str, file_size: int) -> LoadedDocument:
     ext = Path(filename).suffix.lower()
-    file_size = len(file_bytes)
 
     if ext not in SUPPORTED_EXTENSIONS:
         raise ValueError(f"Unsupported file type: {ext}. Supported: {SUPPORTED_EXTENSIONS}")
 
-    logger.info(f"Loading document: {filename} ({file_size:,} bytes, type={ext})")
+    logger.info("Loading document: {} ({:,} bytes, type={})", filename, file_size, ext)
 
     if ext in (".txt", ".md"):
-        text = _load_text(file_bytes, filename)
+        text = _load_text(_read_all(source), filename)
         return LoadedDocument(filename=filename, file_size=file_size, raw_text=text, mime_type="text/plain")
 
     elif ext == ".pdf":
-        text, page_count = _load_pdf(file_bytes, filename)
+        text, page_count = _load_pdf(source, filename)
         return LoadedDocument(
             filename=filename, file_size=file_size, raw_text=text,
             mime_type="application/pdf", page_count=page_count
         )
 
     elif ext == ".docx":
-        text = _load_docx(file_bytes, filename)
+        text = _load_docx(source, filename)
         return LoadedDocument(filename=filename, file_size=file_size, raw_text=text,
                               mime_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
 
     elif ext in (".csv", ".tsv", ".xlsx"):
-        text, row_count = _load_tabular(file_bytes, filename, ext)
+        text, row_count = _load_tabular(source, filename, ext)
         return LoadedDocument(filename=filename, file_size=file_size, raw_text=text,
                               mime_type="text/csv", row_count=row_count)
 
     raise ValueError(f"Unhandled extension: {ext}")
 
 
+def _read_all(source: _Source) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def _read_head(source: _Source, n: int) -> bytes:
+    if isinstance(source, bytes):
+        return source[:n]
+    with open(source, "rb") as f:
+        return f.read(n)
+
+
 def _load_text(file_bytes: bytes, filename: str) -> str:
-    """Decode text files, trying UTF-8 first then latin-1."""
-    for encoding in ("utf-8", "utf-8-sig", "latin-1"):
-        try:
-            return file_bytes.decode(encoding)
-        except UnicodeDecodeError:
-            continue
-    raise ValueError(f"Could not decode {filename} with any known encoding")
+    """
+    Decode text files: honour a UTF-8 BOM, try strict UTF-8 once, and otherwise
+    decode with the encoding chardet guesses from a 64 KB sample starting at
+    the first non-ASCII byte (latin-1 if chardet is unavailable or unsure).
+    At most two full passes, and only non-UTF-8 files take the second.
+    """
+    if file_bytes.startswith(codecs.BOM_UTF8):
+        return file_bytes[len(codecs.BOM_UTF8):].decode("utf-8", errors="replace")
+    try:
+        return file_bytes.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+
+    # An ASCII prefix tells chardet nothing; sample where the encoding shows
+    first = _NON_ASCII_BYTE.search(file_bytes).start()
+    encoding = _sniff_encoding(file_bytes[first:first + _ENCODING_SNIFF_BYTES])
+    logger.debug(f"{filename} is not UTF-8; decoding as {encoding}")
+    try:
+        return file_bytes.decode(encoding, errors="replace")
+    except LookupError:
+        return file_bytes.decode("latin-1")
 
 
-def _load_pdf(file_bytes: bytes, filename: str) -> tuple[str, int]:
-    """Extract text from PDF using PyMuPDF (fitz)."""
+def _sniff_encoding(sample: bytes) -> str:
+    """Best-guess encoding for non-UTF-8 bytes."""
+    try:
+        import chardet
+    except ImportError:
+        return "latin-1"
+    guess = chardet.detect(sample)
+    # Low-confidence guesses on short samples are worse than the latin-1 default,
+    # and an "ascii" guess would turn every high byte into U+FFFD
+    if (not guess["encoding"] or guess["confidence"] < _MIN_ENCODING_CONFIDENCE
+            or guess["encoding"].lower() == "ascii"):
+        return "latin-1"
+    return guess["encoding"]
+
+
+def _load_pdf(source: _Source, filename: str) -> tuple[str, int]:
+    """
+    Extract text from PDF using PyMuPDF (fitz). Pages are read serially:
+    PyMuPDF is single-threaded, and uploads already parse in worker processes.
+    """
     try:
         import fitz  # PyMuPDF
     except ImportError:
         raise ImportError("PyMuPDF not installed. Run: pip install PyMuPDF")
 
-    doc = fitz.open(stream=file_bytes, filetype="pdf")
-    pages = []
-    for page_num, page in enumerate(doc, start=1):
-        page_text = page.get_text("text")
-        if page_text.strip():
-            pages.append(f"[Page {page_num}]\n{page_text}")
+    # Per-page MuPDF warnings are noise here; don't format them to stderr
+    fitz.TOOLS.mupdf_display_errors(False)
+    flags = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_IMAGES
 
+    doc = _open_pdf(source)
+    pages = []
+    for i, page in enumerate(doc):
+        page_text = page.get_text("text", flags=flags, sort=False)
+        if page_text and not page_text.isspace():
+            pages.append(f"[Page {i + 1}]\n{page_text}")
     doc.close()
+
     full_text = "\n\n".join(pages)
-    logger.debug(f"PDF: {len(pages)} pages extracted from {filename}")
+    logger.debug("PDF: {} pages extracted from {}", len(pages), filename)
     return full_text, len(pages)
 
 
-def _load_docx(file_bytes: bytes, filename: str) -> str:
-    """Extract text from DOCX preserving paragraph structure."""
+def _open_pdf(source: _Source):
+    """Open a PDF from bytes, or from a path (MuPDF then reads the file itself)."""
+    import fitz
+
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source, filetype="pdf")
+
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W = f"{{{_W_NS}}}"
+
+# Text-bearing run children and the characters the non-text ones stand for
+_RUN_CONTENT = (
+    "self::w:t or self::w:tab or self::w:ptab or self::w:br or self::w:cr or self::w:noBreakHyphen"
+)
+_RUN_TEXT_XPATH = f"./w:r/*[{_RUN_CONTENT}] | ./w:hyperlink/w:r/*[{_RUN_CONTENT}]"
+_RUN_SEPARATORS = {
+    f"{_W}tab": "\t",
+    f"{_W}ptab": "\t",
+    f"{_W}br": "\n",
+    f"{_W}cr": "\n",
+    f"{_W}noBreakHyphen": "-",
+}
+
+
+def _load_docx(source: _Source, filename: str) -> str:
+    """
+    Extract text from DOCX preserving paragraph structure.
+
+    word/document.xml is parsed once with lxml and the body's paragraphs and
+    tables are read in document order, without building python-docx's
+    object model. Table rows become " | "-joined cell text. Within a run,
+    text, tabs, line/page breaks and non-breaking hyphens are kept; soft
+    hyphens, fields and text boxes are not.
+    """
+    import zipfile
     try:
-        from docx import Document
+        from lxml import etree
     except ImportError:
-        raise ImportError("python-docx not installed. Run: pip install python-docx")
-
-    doc = Document(io.BytesIO(file_bytes))
-    paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
-    # Also extract table content
-    for table in doc.tables:
-        for row in table.rows:
-            row_text = " | ".join(cell.text.strip() for cell in row.cells if cell.text.strip())
+        raise ImportError("lxml not installed. Run: pip install lxml")
+
+    with zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source) as z:
+        xml = z.read("word/document.xml")
+    parser = etree.XMLParser(resolve_entities=False, no_network=True)
+    body = etree.fromstring(xml, parser).find(f"{_W}body")
+    if body is None:
+        return ""
+    ns = {"w": _W_NS}
+    run_text = etree.XPath(_RUN_TEXT_XPATH, namespaces=ns)
+
+    def paragraph_text(p) -> str:
+        return "".join([_RUN_SEPARATORS.get(el.tag, el.text or "") for el in run_text(p)])
+
+    paragraphs: list[str] = []
+    for el in body.iterchildren(f"{_W}p", f"{_W}tbl"):
+        if el.tag == f"{_W}p":
+            text = paragraph_text(el)
+            if text.strip():
+                paragraphs.append(text)
+            continue
+        for row in el.iterfind("w:tr", ns):
+            cells = ("\n".join([paragraph_text(p) for p in tc.iterfind("w:p", ns)]).strip()
+                     for tc in row.iterfind("w:tc", ns))
+            row_text = " | ".join(c for c in cells if c)
             if row_text:
                 paragraphs.append(row_text)
 
     return "\n\n".join(paragraphs)
 
 
-def _load_tabular(file_bytes: bytes, filename: str, ext: str) -> tuple[str, int]:
+def _load_tabular(source: _Source, filename: str, ext: str) -> tuple[str, int]:
     """Convert CSV/TSV/XLSX to a readable text representation."""
     try:
         import pandas as pd
     except ImportError:
         raise ImportError("pandas not installed. Run: pip install pandas")
 
-    buf = io.BytesIO(file_bytes)
-
     if ext == ".csv":
-        # Try to detect delimiter
-        sample = file_bytes[:2048].decode("utf-8", errors="ignore")
-        delimiter = "\t" if sample.count("\t") > sample.count(",") else ","
-        df = pd.read_csv(buf, delimiter=delimiter, on_bad_lines="skip")
+        head = _read_head(source, _CSV_SNIFF_BYTES)
+        truncated = len(head) == _CSV_SNIFF_BYTES
+        delimiter = _sniff_delimiter(head.decode("utf-8", errors="ignore"), truncated)
+        df = _read_delimited(pd, source, delimiter)
     elif ext == ".tsv":
-        df = pd.read_csv(buf, delimiter="\t", on_bad_lines="skip")
+        df = _read_delimited(pd, source, "\t")
     elif ext == ".xlsx":
-        df = pd.read_excel(buf)
+        try:
+            df = pd.read_excel(_tabular_input(source), engine="calamine")
+        except ImportError:
+            df = pd.read_excel(_tabular_input(source))   # python-calamine not installed; openpyxl
 
     row_count = len(df)
-    # Convert to markdown-style table for readability
+    # Tab-separated rows: formatted in C, unlike the pure-Python to_string()
     lines = [f"Columns: {', '.join(df.columns.astype(str))}"]
-    lines.append(df.to_string(index=False, max_rows=1000))
+    lines.append(df.head(1000).to_csv(sep="\t", index=False, lineterminator="\n").rstrip("\n"))
     if row_count > 1000:
         lines.append(f"... ({row_count - 1000} more rows truncated)")
 
     return "\n".join(lines), row_count
+
+
+def _sniff_delimiter(sample: str, truncated: bool) -> str:
+    """
+    Detect a CSV delimiter (comma, tab, semicolon or pipe) from a sample;
+    truncated means the sample may end partway through a line.
+    """
+    # A cut-off last line would skew the sniffer's per-line counts
+    if truncated and "\n" in sample:
+        sample = sample[:sample.rindex("\n")]
+    try:
+        return _CSV_SNIFFER.sniff(sample, delimiters=_CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return "\t" if sample.count("\t") > sample.count(",") else ","
+
+
+def _tabular_input(source: _Source):
+    """A fresh reader for pandas: a path as-is, or the bytes wrapped in a buffer."""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def _read_delimited(pd, source: _Source, delimiter: str):
+    """Read CSV/TSV with pyarrow's multithreaded parser, falling back to pandas' C engine."""
+    try:
+        return pd.read_csv(_tabular_input(source), delimiter=delimiter, on_bad_lines="skip",
+                           engine="pyarrow")
+    except Exception as e:
+        # pyarrow missing, or input its stricter parser rejects
+        logger.debug(f"pyarrow CSV parse unavailable ({e}), using C engine")
+        return pd.read_csv(_tabular_input(source), delimiter=delimiter, on_bad_lines="skip",
+                           memory_map=isinstance(source, str))
@@ -0,0 +1,170 @@
+"""
+Pipeline Cache — in-process LRU of built RAGPipelines, bounded by index memory.
+
+When the total vector storage of cached pipelines exceeds the budget, the
+least recently used pipeline is evicted and spilled to disk as the pair
+RAGPipeline.serialize() produces:
+  {spill_dir}/{doc_id}.index   faiss index (fp16 codes)
+  {spill_dir}/{doc_id}.meta    msgpack metadata
+
+A later lookup reads the pair back with RAGPipeline.deserialize(), which
+copies the codes straight into a new index instead of re-embedding or
+re-encoding, and removes the files (the entry lives in memory again).
+The spill directory is capped at max_spill_bytes: after each spill the
+oldest spills, including any left by earlier processes, are deleted.
+
+get() touches memory only. get_spilled() and put() may read or write spill
+files, so async callers run them in a worker thread; a lock keeps the LRU
+consistent across threads, and spill I/O happens outside it.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from loguru import logger
+
+from .rag_pipeline import RAGPipeline
+
+
+class RAGPipelineCache:
+    """
+    LRU mapping doc_id → RAGPipeline with a total-bytes budget.
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: str, max_spill_bytes: int = 2 * 1024**3):
+        self._max_bytes = max_bytes
+        self._spill_dir = spill_dir
+        self._max_spill_bytes = max_spill_bytes
+        self._entries: OrderedDict[str, RAGPipeline] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Index memory held by the in-process entries."""
+        return self._bytes
+
+    def get(self, doc_id: str) -> Optional[RAGPipeline]:
+        """Return the in-memory pipeline for doc_id, if any (no disk I/O)."""
+        with self._lock:
+            pipeline = self._entries.get(doc_id)
+            if pipeline is not None:
+                self._entries.move_to_end(doc_id)
+            return pipeline
+
+    def get_spilled(self, doc_id: str) -> Optional[RAGPipeline]:
+        """Reload a pipeline evicted to disk and cache it again (blocking I/O)."""
+        pipeline = self._load_spilled(doc_id)
+        if pipeline is not None:
+            self.put(doc_id, pipeline)
+        return pipeline
+
+    def put(self, doc_id: str, pipeline: RAGPipeline) -> None:
+        """
+        Insert a pipeline, evicting least recently used entries over budget.
+        Evicted entries are written to disk (blocking I/O).
+        """
+        evicted: list[tuple[str, RAGPipeline]] = []
+        with self._lock:
+            previous = self._entries.pop(doc_id, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[doc_id] = pipeline
+            self._bytes += pipeline.nbytes
+
+            # Always keep the newest entry, even if it alone exceeds the budget
+            while self._bytes > self._max_bytes and len(self._entries) > 1:
+                evicted_id, entry = self._entries.popitem(last=False)
+                self._bytes -= entry.nbytes
+                evicted.append((evicted_id, entry))
+
+        for evicted_id, entry in evicted:
+            self._spill(evicted_id, entry)
+
+    def discard(self, doc_id: str) -> None:
+        """Drop a pipeline from memory and delete its disk spill, if any."""
+        with self._lock:
+            pipeline = self._entries.pop(doc_id, None)
+            if pipeline is not None:
+                self._bytes -= pipeline.nbytes
+        self._remove_spill(doc_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _spill_paths(self, doc_id: str) -> tuple[str, str]:
+        base = os.path.join(self._spill_dir, doc_id)
+        return f"{base}.index", f"{base}.meta"
+
+    def _spill(self, doc_id: str, pipeline: RAGPipeline) -> None:
+        index_path, meta_path = self._spill_paths(doc_id)
+        if os.path.exists(index_path) and os.path.exists(meta_path):
+            return
+        try:
+            os.makedirs(self._spill_dir, exist_ok=True)
+            index_bytes, meta_bytes = pipeline.serialize()
+            # Write-then-rename so a concurrent reload never sees a partial file;
+            # the meta file lands last and marks the spill complete
+            for path, data in ((index_path, index_bytes), (meta_path, meta_bytes)):
+                with open(f"{path}.tmp", "wb") as f:
+                    f.write(data)
+                os.replace(f"{path}.tmp", path)
+            logger.info(f"Evicted RAG pipeline {doc_id} ({pipeline.nbytes:,} bytes) to disk")
+        except OSError as e:
+            logger.warning(f"Could not spill RAG pipeline {doc_id}: {e}")
+            return
+        self._enforce_spill_cap(keep=doc_id)
+
+    def _enforce_spill_cap(self, keep: str) -> None:
+        """Delete the oldest spills until the directory fits max_spill_bytes."""
+        spills = []
+        total = 0
+        with os.scandir(self._spill_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".index"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                spills.append((stat.st_mtime, entry.name[:-len(".index")], stat.st_size))
+                total += stat.st_size
+        spills.sort()
+        for _, doc_id, size in spills:
+            if total <= self._max_spill_bytes:
+                break
+            if doc_id == keep:
+                continue
+            self._remove_spill(doc_id)
+            total -= size
+
+    def _remove_spill(self, doc_id: str) -> None:
+        # Meta first: without it a concurrent reload treats the spill as absent
+        for path in reversed(self._spill_paths(doc_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _load_spilled(self, doc_id: str) -> Optional[RAGPipeline]:
+        index_path, meta_path = self._spill_paths(doc_id)
+        try:
+            with open(meta_path, "rb") as f:
+                meta_bytes = f.read()
+            with open(index_path, "rb") as f:
+                index_bytes = f.read()
+        except FileNotFoundError:
+            return None
+        self._remove_spill(doc_id)
+        return RAGPipeline.deserialize(index_bytes, meta_bytes)
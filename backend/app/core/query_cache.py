@@ -0,0 +1,92 @@
+"""
+Semantic Query Cache — reuses a previous response when a new query is a
+near-paraphrase of one already answered for the same document.
+
+Per (doc_id, top_k, embedding dim), Redis holds two parallel entries:
+  qcache:{doc_id}:{top_k}:{dim}:vecs   raw float32 bytes of past query embeddings (n × dim)
+  qcache:{doc_id}:{top_k}:{dim}:resps  list of serialized responses, same order
+
+The dim in the key keeps vectors from different embedders apart; a blob of
+1536-dim vectors would otherwise reshape cleanly into 512-dim rows.
+
+Lookup is a FAISS inner-product search over the stored (L2-normalized)
+query embeddings; a hit at or above the threshold returns the stored response.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+from loguru import logger
+
+DEFAULT_THRESHOLD = 0.92
+MAX_ENTRIES_PER_DOC = 256
+
+
+class SemanticQueryCache:
+    """
+    Embedding-keyed response cache backed by Redis.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl: int = 3600,
+        max_entries: int = MAX_ENTRIES_PER_DOC,
+    ):
+        self._redis = redis_client
+        self._threshold = threshold
+        self._ttl = ttl
+        self._max_entries = max_entries
+
+    @staticmethod
+    def _keys(doc_id: str, top_k: int, dim: int) -> tuple[str, str]:
+        prefix = f"qcache:{doc_id}:{top_k}:{dim}"
+        return f"{prefix}:vecs", f"{prefix}:resps"
+
+    def lookup(self, doc_id: str, top_k: int, query_vec: np.ndarray) -> Optional[str]:
+        """Return the stored response for the closest past query, if similar enough."""
+        import faiss
+
+        query_vec = np.ascontiguousarray(query_vec, dtype=np.float32).reshape(1, -1)
+        dim = query_vec.shape[1]
+        vecs_key, resps_key = self._keys(doc_id, top_k, dim)
+        raw = self._redis.get(vecs_key)
+        if not raw or len(raw) % (dim * 4) != 0:
+            return None
+
+        index = faiss.IndexFlatIP(dim)
+        index.add(np.frombuffer(raw, dtype=np.float32).reshape(-1, dim))
+        scores, indices = index.search(query_vec, 1)
+        score, idx = float(scores[0][0]), int(indices[0][0])
+        if idx == -1 or score < self._threshold:
+            return None
+
+        cached = self._redis.lindex(resps_key, idx)
+        if cached is None:
+            return None
+        logger.info(f"Semantic cache hit for {doc_id} (similarity {score:.3f})")
+        return cached.decode("utf-8") if isinstance(cached, bytes) else cached
+
+    def store(self, doc_id: str, top_k: int, query_vec: np.ndarray, response: str) -> None:
+        """Append a query embedding and its response to the document's cache."""
+        query_vec = np.ascontiguousarray(query_vec, dtype=np.float32).reshape(1, -1)
+        vecs_key, resps_key = self._keys(doc_id, top_k, query_vec.shape[1])
+        if self._redis.llen(resps_key) >= self._max_entries:
+            return
+
+        vec_bytes = query_vec.tobytes()
+        # MULTI/EXEC keeps the vector blob and the response list aligned
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.append(vecs_key, vec_bytes)
+        pipe.rpush(resps_key, response)
+        pipe.expire(vecs_key, self._ttl)
+        pipe.expire(resps_key, self._ttl)
+        pipe.execute()
+
+    def invalidate(self, doc_id: str) -> None:
+        """Forget every cached response for a document (all top_k / dim variants)."""
+        keys = list(self._redis.scan_iter(match=f"qcache:{doc_id}:*"))
+        if keys:
+            self._redis.delete(*keys)
@@ -2,29 +2,75 @@
 RAG Pipeline — FAISS vector store with OpenAI primary / sentence-transformers fallback.
 
 Embedding strategy:
-  - If OPENAI_API_KEY is set: use text-embedding-3-small (1536-dim)
+  - If OPENAI_API_KEY is set: use text-embedding-3-small, shortened to 512 dims
   - Otherwise: use sentence-transformers all-MiniLM-L6-v2 (384-dim, local)
 
 FAISS index is built per-document and optionally cached in Redis.
 """
 from __future__ import annotations
 
+import hashlib
+import io
 import os
-import pickle
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Optional
 
 import numpy as np
 from loguru import logger
 
+from ..utils.logging import lazy_logger
 from .chunking_engine import Chunk
 
+# OpenAI embedding requests: inputs per request, and requests in flight
+_OPENAI_BATCH_SIZE = 96
+_OPENAI_MAX_CONCURRENCY = 8
+
+_OPENAI_MODEL = "text-embedding-3-small"
+_LOCAL_MODEL = "all-MiniLM-L6-v2"
+_LOCAL_EMBEDDING_DIM = 384
+
+# text-embedding-3-small is Matryoshka-trained: its leading 512 of 1536 dims,
+# re-normalized, retrieve nearly as well at a third of the index size
+_OPENAI_EMBEDDING_DIM = 512
+
+# Local encoder batch size; half-precision activations leave room for 64
+_LOCAL_BATCH_SIZE = 64
+
 
 @dataclass
-class RetrievedChunk:
-    chunk: Chunk
-    score: float       # cosine similarity (0–1, higher is better)
-    rank: int
+class RetrievalResult:
+    """
+    Ranked chunks as parallel arrays (struct-of-arrays), best match first.
+    """
+    indices: np.ndarray        # int32 chunk.index (document position)
+    token_counts: np.ndarray   # int32
+    scores: np.ndarray         # float32 similarity / BM25 score, higher is better
+    texts: list[str]
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @classmethod
+    def from_chunks(cls, chunks: list[Chunk], scores) -> "RetrievalResult":
+        return cls(
+            indices=np.fromiter((c.index for c in chunks), dtype=np.int32, count=len(chunks)),
+            token_counts=np.fromiter((c.token_count for c in chunks), dtype=np.int32, count=len(chunks)),
+            scores=np.asarray(scores, dtype=np.float32),
+            texts=[c.text for c in chunks],
+        )
+
+    def take(self, order: np.ndarray) -> "RetrievalResult":
+        """Reorder / subset every column by the given positions."""
+        return RetrievalResult(
+            indices=self.indices[order],
+            token_counts=self.token_counts[order],
+            scores=self.scores[order],
+            texts=[self.texts[i] for i in order],
+        )
 
 
 class RAGPipeline:
@@ -35,38 +81,68 @@ class RAGPipeline:
     def __init__(self, use_openai: Optional[bool] = None):
         self._embedder = None
         self._use_openai = use_openai
-        self._index = None          # faiss.IndexFlatIP
+        self._index = None          # faiss.IndexScalarQuantizer (fp16, inner product)
         self._chunks: list[Chunk] = []
         self._dim: Optional[int] = None
+        self._model: Optional[str] = None   # preset on pipelines restored from cache
 
     # ------------------------------------------------------------------
     # Embedding
     # ------------------------------------------------------------------
 
+    @property
+    def embedder_loaded(self) -> bool:
+        """True once the embedding model/client has been created."""
+        return self._embedder is not None
+
+    def load_embedder(self) -> None:
+        """Create the embedding model/client now instead of on first use."""
+        self._get_embedder()
+
+    @property
+    def embedder_kind(self) -> Optional[str]:
+        """"openai" or "local" once resolved, None while it still depends on OPENAI_API_KEY."""
+        if self._embedder is not None:
+            return self._embedder[0]
+        if self._use_openai is not None:
+            return "openai" if self._use_openai else "local"
+        return None
+
     def _get_embedder(self):
         if self._embedder is not None:
             return self._embedder
 
         openai_key = os.getenv("OPENAI_API_KEY", "")
         use_openai = self._use_openai if self._use_openai is not None else bool(openai_key)
+        # A pipeline restored from cache must embed queries with the model that
+        # built its index: it keeps that model and dimension, and never falls back
+        restored = self._model is not None
 
         if use_openai:
             try:
                 from openai import OpenAI
                 client = OpenAI(api_key=openai_key)
                 self._embedder = ("openai", client)
-                self._dim = 1536
-                logger.info("Embedder: OpenAI text-embedding-3-small (1536-dim)")
+                self._model = self._model or _OPENAI_MODEL
+                if self._dim is None:
+                    self._dim = _OPENAI_EMBEDDING_DIM
+                logger.info(f"Embedder: OpenAI {self._model} ({self._dim}-dim)")
                 return self._embedder
             except Exception as e:
+                if restored:
+                    raise RuntimeError(
+                        f"Index was built with OpenAI {self._model}, which is unavailable: {e}"
+                    ) from e
                 logger.warning(f"OpenAI embedder failed ({e}), falling back to local")
 
         # Local fallback
         from sentence_transformers import SentenceTransformer
-        model = SentenceTransformer("all-MiniLM-L6-v2")
+        self._model = self._model or _LOCAL_MODEL
+        model = _reduced_precision(SentenceTransformer(self._model))
         self._embedder = ("local", model)
-        self._dim = 384
-        logger.info("Embedder: sentence-transformers all-MiniLM-L6-v2 (384-dim)")
+        if self._dim is None:
+            self._dim = _LOCAL_EMBEDDING_DIM
+        logger.info(f"Embedder: sentence-transformers {self._model} ({self._dim}-dim)")
         return self._embedder
 
     def _embed_texts(self, texts: list[str]) -> np.ndarray:
@@ -74,26 +150,30 @@ class RAGPipeline:
         embedder_type, embedder = self._get_embedder()
 
         if embedder_type == "openai":
-            response = embedder.embeddings.create(
-                model="text-embedding-3-small",
-                input=texts,
-            )
-            vectors = np.array([item.embedding for item in response.data], dtype=np.float32)
-        else:
-            vectors = embedder.encode(texts, normalize_embeddings=True, show_progress_bar=False)
-            vectors = np.array(vectors, dtype=np.float32)
-
-        # L2-normalize for cosine similarity via dot product
-        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
-        norms = np.where(norms == 0, 1, norms)
-        return vectors / norms
+            import faiss
+
+            vectors = _openai_embed(embedder, texts, self._model, self._dim)
+            # L2-normalize in place for cosine similarity via dot product
+            # (shortened embeddings come back unnormalized)
+            faiss.normalize_L2(vectors)
+            return vectors
+
+        # sentence-transformers already normalizes with normalize_embeddings=True
+        vectors = embedder.encode(
+            texts, batch_size=_LOCAL_BATCH_SIZE, normalize_embeddings=True, show_progress_bar=False
+        )
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Return the L2-normalized embedding (1, dim) for a single query."""
+        return self._embed_texts([query])
 
     # ------------------------------------------------------------------
     # Index management
     # ------------------------------------------------------------------
 
     def build_index(self, chunks: list[Chunk]) -> None:
-        """Embed all chunks and build a FAISS flat inner-product index."""
+        """Embed all chunks and build an fp16 FAISS inner-product index."""
         try:
             import faiss
         except ImportError:
@@ -109,97 +189,293 @@ class RAGPipeline:
         vectors = self._embed_texts(texts)
         self._dim = vectors.shape[1]
 
-        self._index = faiss.IndexFlatIP(self._dim)   # inner product = cosine sim on normalized vecs
-        self._index.add(vectors)
+        self._index = _new_index(self._dim, vectors)
         logger.info(f"FAISS index built: {self._index.ntotal} vectors, dim={self._dim}")
 
-    def retrieve(self, query: str, top_k: int = 5) -> list[RetrievedChunk]:
-        """Retrieve the top-k most relevant chunks for a query."""
+    def retrieve(
+        self, query: str, top_k: int = 5, query_vec: Optional[np.ndarray] = None
+    ) -> RetrievalResult:
+        """
+        Retrieve the top-k most relevant chunks for a query. query_vec is an
+        embed_query() result the caller already has; it is re-embedded here
+        if it came from an embedder of a different dimension.
+        """
         if self._index is None:
             raise RuntimeError("Index not built. Call build_index() first.")
 
-        import faiss
-
-        query_vec = self._embed_texts([query])   # (1, dim)
+        if query_vec is None or query_vec.shape[1] != self._index.d:
+            query_vec = self.embed_query(query)   # (1, dim)
         scores, indices = self._index.search(query_vec, min(top_k, len(self._chunks)))
 
-        results = []
-        for rank, (idx, score) in enumerate(zip(indices[0], scores[0]), start=1):
-            if idx == -1:
-                continue
-            results.append(RetrievedChunk(
-                chunk=self._chunks[idx],
-                score=float(score),
-                rank=rank,
-            ))
-
-        logger.info(f"Retrieved {len(results)} chunks for query (top score: {results[0].score:.3f})" if results else "No results retrieved")
+        found = indices[0] != -1
+        results = RetrievalResult.from_chunks(
+            [self._chunks[i] for i in indices[0][found]],
+            scores[0][found],
+        )
+
+        lazy_logger.info(
+            "Retrieved {n} chunks for query (top score: {top})",
+            n=lambda: len(results),
+            top=lambda: f"{results.scores[0]:.3f}" if len(results) else "n/a",
+        )
         return results
 
     # ------------------------------------------------------------------
     # Serialization (for Redis cache)
     # ------------------------------------------------------------------
 
-    def serialize(self) -> bytes:
-        """Serialize index + chunks to bytes for Redis storage."""
+    def serialize(self) -> tuple[bytes, bytes]:
+        """
+        Serialize to an (index, metadata) pair for Redis storage.
+
+        The index is written by faiss' own C++ writer straight into a buffer
+        (no numpy round-trip, and read back without re-encoding vectors);
+        chunks go in a small msgpack sidecar.
+        """
         try:
             import faiss
         except ImportError:
-            raise ImportError("faiss-cpu not installed.")
+            raise ImportError("faiss-cpu not installed. Run: pip install faiss-cpu")
+
+        buf = io.BytesIO()
+        writer = faiss.PyCallbackIOWriter(buf.write)
+        faiss.write_index(self._index, writer)
+        del writer   # flushes any buffered bytes into buf
+        return buf.getvalue(), self.serialize_meta()
 
-        index_bytes = faiss.serialize_index(self._index)
-        payload = {
-            "index_bytes": index_bytes.tobytes(),
-            "chunks": self._chunks,
+    def serialize_meta(self) -> bytes:
+        """The msgpack metadata half of serialize(): chunks and embedder settings."""
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError("msgpack not installed. Run: pip install msgpack")
+
+        # Chunks are stored as plain row tuples. An Arrow IPC stream was measured
+        # as an alternative: rebuilding Chunks costs the same either way, and
+        # converting the Python lists into Arrow columns made packing ~7x slower
+        kind = self.embedder_kind
+        meta = {
             "dim": self._dim,
-            "use_openai": self._use_openai,
+            # The resolved embedder, so a restored index is queried with the same model
+            "embedder": kind,
+            "model": self._model or _default_model(kind),
+            "chunks": [
+                (c.index, c.text, c.token_count, c.section_header, c.start_char, c.end_char)
+                for c in self._chunks
+            ],
         }
-        return pickle.dumps(payload)
+        return msgpack.packb(meta, use_bin_type=True)
 
     @classmethod
-    def deserialize(cls, data: bytes) -> "RAGPipeline":
-        """Restore a RAGPipeline from serialized bytes."""
+    def deserialize(cls, index_bytes: bytes, meta_bytes: bytes) -> "RAGPipeline":
+        """Restore a RAGPipeline from the pair produced by serialize()."""
         try:
             import faiss
         except ImportError:
-            raise ImportError("faiss-cpu not installed.")
-
-        payload = pickle.loads(data)
-        pipeline = cls(use_openai=payload["use_openai"])
-        pipeline._chunks = payload["chunks"]
-        pipeline._dim = payload["dim"]
-        index_array = np.frombuffer(payload["index_bytes"], dtype=np.uint8)
-        pipeline._index = faiss.deserialize_index(index_array)
+            raise ImportError("faiss-cpu not installed. Run: pip install faiss-cpu")
+
+        reader = faiss.PyCallbackIOReader(io.BytesIO(index_bytes).read)
+        index = faiss.read_index(reader)
+        del reader
+        return cls._restore(index, _unpack_meta(meta_bytes))
+
+    @classmethod
+    def from_vectors(cls, vectors: np.ndarray, meta_bytes: bytes) -> "RAGPipeline":
+        """
+        Build a RAGPipeline from an embedding matrix plus serialize_meta(),
+        encoding the vectors into a new index.
+        """
+        meta = _unpack_meta(meta_bytes)
+        return cls._restore(_new_index(meta["dim"], vectors), meta)
+
+    @classmethod
+    def _restore(cls, index, meta: dict) -> "RAGPipeline":
+        kind = meta.get("embedder")
+        if kind is None:
+            # Written before the embedder was recorded: infer it from the dimension
+            kind = "local" if meta["dim"] == _LOCAL_EMBEDDING_DIM else "openai"
+        pipeline = cls(use_openai=kind == "openai")
+        pipeline._model = meta.get("model") or _default_model(kind)
+        pipeline._chunks = [
+            Chunk(index=i, text=t, token_count=n, section_header=h, start_char=s, end_char=e)
+            for i, t, n, h, s, e in meta["chunks"]
+        ]
+        pipeline._dim = meta["dim"]
+        pipeline._index = index
         return pipeline
 
+    @property
+    def embeddings(self) -> np.ndarray:
+        """
+        The indexed embedding matrix (n, dim) as float16, exactly as stored in
+        the index, so serialized copies take half the bytes of float32.
+        """
+        return self._index.reconstruct_n(0, self._index.ntotal).astype(np.float16)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the index's vector storage."""
+        if self._index is None:
+            return 0
+        return self._index.ntotal * self._index.sa_code_size()
+
+
+def _default_model(kind: Optional[str]) -> Optional[str]:
+    return {"openai": _OPENAI_MODEL, "local": _LOCAL_MODEL}.get(kind)
+
+
+def _unpack_meta(meta_bytes: bytes) -> dict:
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("msgpack not installed. Run: pip install msgpack")
+    return msgpack.unpackb(meta_bytes, raw=False)
+
+
+def _openai_embed(client, texts: list[str], model: str, dimensions: int) -> np.ndarray:
+    """
+    Embed texts with OpenAI in requests of at most _OPENAI_BATCH_SIZE inputs,
+    issued concurrently. The sync client on a thread pool works whether or not
+    the caller is inside an event loop; the threads just wait on the network.
+    """
+    def embed(group: list[str]) -> list[list[float]]:
+        response = client.embeddings.create(
+            model=model, input=group, dimensions=dimensions
+        )
+        return [item.embedding for item in response.data]
+
+    groups = [texts[i:i + _OPENAI_BATCH_SIZE] for i in range(0, len(texts), _OPENAI_BATCH_SIZE)]
+    if len(groups) == 1:
+        return np.array(embed(groups[0]), dtype=np.float32)
+
+    with ThreadPoolExecutor(max_workers=min(_OPENAI_MAX_CONCURRENCY, len(groups))) as pool:
+        batches = list(pool.map(embed, groups))
+    return np.array([vec for batch in batches for vec in batch], dtype=np.float32)
+
+
+def _reduced_precision(model):
+    """
+    Run the local embedder in fp16 on CUDA, or bf16 on CPUs with native BF16
+    support (AVX-512 BF16 / AMX); otherwise leave it in fp32.
+    """
+    try:
+        import torch
+    except ImportError:
+        return model
+
+    try:
+        if torch.cuda.is_available():
+            logger.info("Local embedder: fp16 on CUDA")
+            return model.half().to("cuda")
+        if torch.cpu._is_avx512_bf16_supported() or torch.cpu._is_amx_tile_supported():
+            logger.info("Local embedder: bf16 on CPU")
+            return model.to(dtype=torch.bfloat16)
+    except Exception as e:
+        logger.warning(f"Reduced-precision embedder unavailable ({e}), using fp32")
+    return model
+
+
+def _new_index(dim: int, vectors: np.ndarray):
+    """
+    Inner-product index (cosine similarity on normalized vectors) holding
+    fp16 codes: half the memory and scan bandwidth of IndexFlatIP, with
+    negligible effect on ranking for unit-length embeddings.
+    """
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    index.train(vectors)   # no-op for QT_fp16, but required by the API
+    index.add(vectors)
+    return index
+
 
 # ------------------------------------------------------------------
 # BM25 ranking for Tier 3 (no embeddings needed)
 # ------------------------------------------------------------------
 
-def bm25_rank_chunks(chunks: list[Chunk], query: str, top_k: int) -> list[RetrievedChunk]:
+def bm25_rank_chunks(chunks: list[Chunk], query: str, top_k: int) -> RetrievalResult:
     """
     Rank chunks using BM25 keyword scoring (fast, no embeddings).
     Used for Tier 3 where semantic search isn't required.
     """
-    try:
-        from rank_bm25 import BM25Okapi
-    except ImportError:
-        raise ImportError("rank-bm25 not installed. Run: pip install rank-bm25")
+    if not chunks:
+        return RetrievalResult.from_chunks([], [])
+
+    tokenized_query = _bm25_tokenize(query)
+    retriever = _bm25_index(chunks) if tokenized_query else None
+    if retriever is not None:
+        scores = retriever.get_scores(tokenized_query)
+    else:
+        # Nothing to match on: every chunk ties, so they come back in document order
+        scores = np.zeros(len(chunks), dtype=np.float32)
+
+    order = _top_k_stable(scores, top_k)
+    return RetrievalResult.from_chunks([chunks[i] for i in order], scores[order])
 
-    tokenized_corpus = [c.text.lower().split() for c in chunks]
-    tokenized_query = query.lower().split()
 
-    bm25 = BM25Okapi(tokenized_corpus)
-    scores = bm25.get_scores(tokenized_query)
+# Word runs; punctuation is dropped instead of sticking to neighbouring words
+_BM25_TOKEN = re.compile(r"\w+")
 
-    ranked = sorted(
-        zip(chunks, scores),
-        key=lambda x: x[1],
-        reverse=True
-    )
 
-    return [
-        RetrievedChunk(chunk=chunk, score=float(score), rank=rank)
-        for rank, (chunk, score) in enumerate(ranked[:top_k], start=1)
-    ]
+def _bm25_tokenize(text: str) -> list[str]:
+    return _BM25_TOKEN.findall(text.lower())
+
+
+def _top_k_stable(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Positions of the top_k scores, best first, document order among equal
+    scores (same as a stable full argsort cut at top_k). Candidates are found
+    with an O(n) partition, so only top_k values are sorted.
+    """
+    n = len(scores)
+    if top_k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if top_k < n:
+        kth = np.partition(scores, n - top_k)[n - top_k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[: top_k - len(above)]
+        candidates = np.concatenate([above, ties])
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+_BM25_CACHE_SIZE = 32
+_bm25_cache: OrderedDict[bytes, object] = OrderedDict()
+_bm25_lock = threading.Lock()
+
+
+def _bm25_index(chunks: list[Chunk]):
+    """
+    bm25s index over the chunks, reused across queries on the same corpus
+    (LRU keyed by a hash of the chunk texts). None if no chunk has a word token.
+    """
+    try:
+        import bm25s
+    except ImportError:
+        raise ImportError("bm25s not installed. Run: pip install bm25s")
+
+    digest = hashlib.blake2b(digest_size=16)
+    for c in chunks:
+        digest.update(c.text.encode("utf-8"))
+        digest.update(b"\x00")
+    key = digest.digest()
+
+    with _bm25_lock:
+        retriever = _bm25_cache.get(key)
+        if retriever is not None:
+            _bm25_cache.move_to_end(key)
+            return retriever
+
+    corpus = [_bm25_tokenize(c.text) for c in chunks]
+    if not any(corpus):
+        return None   # bm25s cannot index an empty vocabulary
+    retriever = bm25s.BM25()
+    retriever.index(corpus, show_progress=False)
+
+    with _bm25_lock:
+        _bm25_cache[key] = retriever
+        while len(_bm25_cache) > _BM25_CACHE_SIZE:
+            _bm25_cache.popitem(last=False)
+    return retriever
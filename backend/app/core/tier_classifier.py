@@ -10,11 +10,15 @@ T4    > 50,000         RAG retrieval (FAISS + embeddings)
 """
 from __future__ import annotations
 
-from dataclasses import dataclass
+from bisect import bisect_left
+from dataclasses import dataclass, replace
 from enum import IntEnum
+from typing import Optional
 
 from loguru import logger
 
+from .token_estimator import count_tokens, estimate_tokens_from_bytes
+
 
 class Tier(IntEnum):
     T1 = 1
@@ -30,6 +34,10 @@ TIER_THRESHOLDS = {
     # T4: anything above 50K
 }
 
+# A byte-based estimate decides the tier unless it lands within this fraction
+# of a threshold, where only an exact count can settle it
+ESTIMATE_MARGIN = 0.15
+
 TIER_LABELS = {
     Tier.T1: "Direct Injection",
     Tier.T2: "Smart Trimming",
@@ -50,31 +58,56 @@ class TierResult:
     tier: Tier
     token_count: int
     label: str
-    color: str
-    description: str
+    color: Optional[str] = None         # display-only; assemble() never reads these
+    description: Optional[str] = None
 
 
-def classify(token_count: int) -> TierResult:
-    """Classify a document into a processing tier based on its token count."""
-    if token_count <= TIER_THRESHOLDS[Tier.T1]:
-        tier = Tier.T1
-        description = "Full document fits in context window. No processing needed."
-    elif token_count <= TIER_THRESHOLDS[Tier.T2]:
-        tier = Tier.T2
-        description = "Moderate size. Boilerplate removal and whitespace compression applied."
-    elif token_count <= TIER_THRESHOLDS[Tier.T3]:
-        tier = Tier.T3
-        description = "Large document. Semantic chunking with BM25 relevance ranking."
-    else:
-        tier = Tier.T4
-        description = "Very large document. Vector embeddings + FAISS retrieval."
-
-    result = TierResult(
+TIER_DESCRIPTIONS = {
+    Tier.T1: "Full document fits in context window. No processing needed.",
+    Tier.T2: "Moderate size. Boilerplate removal and whitespace compression applied.",
+    Tier.T3: "Large document. Semantic chunking with BM25 relevance ranking.",
+    Tier.T4: "Very large document. Vector embeddings + FAISS retrieval.",
+}
+
+# Ascending upper bounds (inclusive) and one TierResult template per tier;
+# classify() only fills in token_count
+_THRESHOLD_BOUNDS = [TIER_THRESHOLDS[t] for t in (Tier.T1, Tier.T2, Tier.T3)]
+_PROTOTYPES = [
+    TierResult(
         tier=tier,
-        token_count=token_count,
+        token_count=0,
         label=TIER_LABELS[tier],
         color=TIER_COLORS[tier],
-        description=description,
+        description=TIER_DESCRIPTIONS[tier],
     )
-    logger.info(f"Tier classification: {token_count:,} tokens → {tier.name} ({result.label})")
+    for tier in Tier
+]
+
+
+def classify(token_count: int) -> TierResult:
+    """Classify a document into a processing tier based on its token count."""
+    # bisect_left: a count equal to a threshold stays in the lower tier
+    result = replace(_PROTOTYPES[bisect_left(_THRESHOLD_BOUNDS, token_count)], token_count=token_count)
+    logger.info("Tier classification: {:,} tokens → {} ({})", token_count, result.tier.name, result.label)
     return result
+
+
+def tiering_token_count(text: str) -> tuple[int, bool]:
+    """
+    Token count good enough to classify text, as (count, is_estimate): the
+    ~4 bytes/token estimate for ASCII text clearly inside a tier, otherwise
+    the exact tiktoken count. Non-ASCII text is always counted exactly; CJK,
+    for one, runs closer to 1.3 bytes per token, far outside the margin.
+    """
+    if not text.isascii():
+        return count_tokens(text), False
+
+    estimate = estimate_tokens_from_bytes(len(text))
+    near_boundary = any(
+        abs(estimate - threshold) < ESTIMATE_MARGIN * threshold
+        for threshold in TIER_THRESHOLDS.values()
+    )
+    if not near_boundary:
+        logger.debug("Tiering on estimate: ~{:,} tokens", estimate)
+        return estimate, True
+    return count_tokens(text), False
@@ -3,9 +3,12 @@ Token Estimator — exact token counts using tiktoken (cl100k_base).
 """
 from __future__ import annotations
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 from typing import Optional
 
+import numpy as np
 from loguru import logger
 
 
@@ -24,7 +27,9 @@ def count_tokens(text: str) -> int:
     if not text:
         return 0
     enc = _get_encoding()
-    return len(enc.encode(text))
+    # encode_ordinary skips special-token scanning; document text is never
+    # meant to contain <|endoftext|>-style markers
+    return len(enc.encode_ordinary(text))
 
 
 def estimate_tokens_from_bytes(byte_size: int) -> int:
@@ -35,19 +40,65 @@ def estimate_tokens_from_bytes(byte_size: int) -> int:
     return byte_size // 4
 
 
+_SEPARATOR = "<|endoftext|>"
+
+# tiktoken's BPE releases the GIL, so large batches are split across threads
+_TOKENIZE_THREADS = min(8, os.cpu_count() or 1)
+_MIN_TEXTS_PER_THREAD = 512
+_TOKENIZE_POOL = ThreadPoolExecutor(max_workers=_TOKENIZE_THREADS, thread_name_prefix="tokenize")
+
+
 def count_tokens_batch(texts: list[str]) -> list[int]:
-    """Count tokens for a list of strings efficiently."""
+    """
+    Count tokens for a list of strings efficiently.
+
+    Large batches are cut into contiguous shards counted on a thread pool;
+    each shard is encoded in a single call (see _count_joined).
+    """
+    if not texts:
+        return []
+    shards = min(_TOKENIZE_THREADS, len(texts) // _MIN_TEXTS_PER_THREAD)
+    if shards <= 1:
+        return _count_joined(texts)
+
+    bounds = [len(texts) * k // shards for k in range(shards + 1)]
+    parts = _TOKENIZE_POOL.map(
+        _count_joined, [texts[bounds[k]:bounds[k + 1]] for k in range(shards)]
+    )
+    return [count for part in parts for count in part]
+
+
+def _count_joined(texts: list[str]) -> list[int]:
+    """
+    Join texts with the <|endoftext|> special token and encode them in one
+    call. Special tokens are split out before BPE, so each text encodes
+    exactly as it would alone, and per-text counts are the gaps between
+    separator positions.
+    """
     enc = _get_encoding()
-    return [len(enc.encode(t)) for t in texts]
+    # Other special-token strings in the text (<|endofprompt|>, <|fim_prefix|>, ...)
+    # encode as ordinary text, as encode_ordinary would
+    tokens = enc.encode_to_numpy(
+        _SEPARATOR.join(texts), allowed_special={_SEPARATOR}, disallowed_special=()
+    )
+    positions = np.flatnonzero(tokens == enc.eot_token)
+    if len(positions) != len(texts) - 1:
+        # A text contains the separator literally; boundaries are ambiguous
+        return [len(enc.encode_ordinary(t)) for t in texts]
+    return (np.diff(positions, prepend=-1, append=len(tokens)) - 1).tolist()
 
 
-def truncate_to_tokens(text: str, max_tokens: int) -> str:
-    """Truncate text to at most max_tokens tokens, preserving whole tokens."""
+def truncate_to_tokens(text: str, max_tokens: int) -> tuple[str, int]:
+    """
+    Truncate text to at most max_tokens tokens, preserving whole tokens.
+    Returns (kept_text, kept_token_count) so callers needn't re-encode.
+    """
     if not text:
-        return text
+        return text, 0
     enc = _get_encoding()
-    tokens = enc.encode(text)
+    tokens = enc.encode_ordinary(text)
     if len(tokens) <= max_tokens:
-        return text
-    logger.debug(f"Truncating from {len(tokens)} to {max_tokens} tokens")
-    return enc.decode(tokens[:max_tokens])
+        return text, len(tokens)
+    logger.debug("Truncating from {} to {} tokens", len(tokens), max_tokens)
+    kept = tokens[:max_tokens]
+    return enc.decode(kept), len(kept)
@@ -3,10 +3,13 @@ Smart Document Context Handler — FastAPI Application Entry Point
 """
 from __future__ import annotations
 
+import asyncio
+import importlib
 import os
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from loguru import logger
 
 from .api.routes import documents, query
 from .config import get_settings
@@ -47,6 +50,33 @@ async def on_startup() -> None:
     os.makedirs(settings.upload_dir, exist_ok=True)
     os.makedirs("logs", exist_ok=True)
     await create_tables()
+    if settings.preload_on_startup:
+        # Kept on app.state so the task isn't garbage-collected mid-run
+        app.state.preload = asyncio.create_task(asyncio.to_thread(_preload))
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    documents.shutdown_parse_pool()
+
+
+# Imported inside request handlers on first use; worth paying for at boot instead
+_PRELOAD_MODULES = ("fitz", "pandas", "faiss", "bm25s", "sentence_transformers")
+
+
+def _preload() -> None:
+    """Import heavy optional dependencies and load query-time models off the event loop."""
+    for name in _PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass   # Optional dependency; the code path that needs it reports this
+    try:
+        query.warm_up()
+    except Exception as e:
+        logger.warning(f"Startup preload incomplete: {e}")
+        return
+    logger.info("Startup preload complete")
 
 
 @app.get("/api/health", tags=["health"])
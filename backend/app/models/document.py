@@ -25,6 +25,7 @@ class UploadResponse(BaseModel):
     filename: str
     file_size: int
     token_count: int
+    token_count_estimated: bool = False   # bytes/4 estimate rather than an exact count
     tier: TierInfo
     budget: TokenBudgetResponse
     mime_type: Optional[str] = None
@@ -61,6 +62,7 @@ class DocumentMetadata(BaseModel):
     filename: str
     file_size: int
     token_count: int
+    token_count_estimated: bool = False
     tier: int
     tier_label: str
     mime_type: Optional[str] = None
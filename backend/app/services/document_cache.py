@@ -0,0 +1,72 @@
+"""
+Per-document query caches shared by the API routes.
+
+  rag_cache        in-process LRU of T4 RAG pipelines (spilling to disk)
+  rag:{doc_id}:*   serialized pipelines in Redis
+  qcache:{doc_id}  semantic query cache in Redis
+
+Deleting a document drops all three and tombstones its id, so a T4 query
+that was already in flight cannot cache it again once it finishes.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import OrderedDict
+
+import redis as redis_lib
+import redis.asyncio as aioredis
+
+from ..config import get_settings
+from ..core import RAGPipelineCache, SemanticQueryCache
+from ..utils.redis_batch import CoalescingRedisReader
+
+settings = get_settings()
+
+# One connection pool per process instead of a new client per lookup
+_REDIS_POOL = redis_lib.ConnectionPool.from_url(settings.redis_url, max_connections=32)
+
+# RAG pipeline lookups from concurrent T4 queries share MGET round-trips
+async_redis = aioredis.Redis(
+    connection_pool=aioredis.ConnectionPool.from_url(settings.redis_url, max_connections=32)
+)
+rag_reader = CoalescingRedisReader(async_redis)
+
+# In-process LRU: doc_id → RAGPipeline (for T4 documents), bounded by index memory
+rag_cache = RAGPipelineCache(
+    max_bytes=settings.rag_cache_max_mb * 1024 * 1024,
+    spill_dir=os.path.join(settings.upload_dir, "rag_spill"),
+    max_spill_bytes=settings.rag_spill_max_mb * 1024 * 1024,
+)
+
+# Ids of documents deleted by this process, oldest first
+_TOMBSTONE_LIMIT = 10_000
+_tombstones: OrderedDict[str, None] = OrderedDict()
+
+
+def semantic_cache() -> SemanticQueryCache:
+    return SemanticQueryCache(
+        redis_lib.Redis(connection_pool=_REDIS_POOL),
+        threshold=settings.semantic_cache_threshold,
+        ttl=settings.redis_cache_ttl,
+    )
+
+
+def is_deleted(doc_id: str) -> bool:
+    """True if doc_id was deleted; callers check after caching anything for it."""
+    return doc_id in _tombstones
+
+
+async def invalidate_document(doc_id: str) -> None:
+    """Drop every cached artifact for a deleted document."""
+    # Tombstone first: a query that caches after this point sees it and cleans up
+    _tombstones[doc_id] = None
+    while len(_tombstones) > _TOMBSTONE_LIMIT:
+        _tombstones.popitem(last=False)
+
+    await asyncio.to_thread(rag_cache.discard, doc_id)
+    try:
+        await async_redis.delete(f"rag:{doc_id}:index", f"rag:{doc_id}:meta")
+        await asyncio.to_thread(semantic_cache().invalidate, doc_id)
+    except Exception:
+        pass  # Redis unavailable; remaining entries expire with their TTL
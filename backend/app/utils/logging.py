@@ -5,6 +5,10 @@ import sys
 
 from loguru import logger
 
+# Deferred-argument logger for hot paths: callables passed as format arguments
+# are only evaluated (and the message only formatted) if some sink takes the level
+lazy_logger = logger.opt(lazy=True)
+
 
 def setup_logging(debug: bool = False) -> None:
     logger.remove()
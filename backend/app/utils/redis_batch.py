@@ -0,0 +1,64 @@
+"""
+Coalescing Redis reader — batches GETs issued by concurrent requests.
+
+Each get() parks a future; the first one in a window schedules a flush after
+max_wait seconds (or sooner once max_batch keys are pending). The flush
+resolves every pending key with a single MGET round-trip.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Optional
+
+
+class CoalescingRedisReader:
+    """
+    Batches concurrent GETs against an asyncio Redis client into MGETs.
+    """
+
+    def __init__(self, client, max_wait: float = 0.005, max_batch: int = 64):
+        self._client = client
+        self._max_wait = max_wait
+        self._max_batch = max_batch
+        self._pending: dict[str, list[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+
+        if len(self._pending) >= self._max_batch:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._max_wait, self._schedule_flush)
+        return await future
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._flush(batch))
+        # Hold a reference until done so the task isn't garbage-collected mid-flight
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: dict[str, list[asyncio.Future]]) -> None:
+        keys = list(batch)
+        try:
+            values = await self._client.mget(keys)
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, value in zip(keys, values):
+            for future in batch[key]:
+                if not future.done():
+                    future.set_result(value)
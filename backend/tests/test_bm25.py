@@ -0,0 +1,70 @@
+"""Tests for BM25 ranking of Tier 3 chunks."""
+import numpy as np
+import pytest
+
+pytest.importorskip("bm25s")
+
+from app.core import rag_pipeline
+from app.core.chunking_engine import Chunk
+from app.core.rag_pipeline import _bm25_index, _top_k_stable, bm25_rank_chunks
+
+
+def _chunks(*texts: str) -> list[Chunk]:
+    return [Chunk(index=i, text=t, token_count=len(t.split())) for i, t in enumerate(texts)]
+
+
+def test_ranks_matching_chunks_first():
+    chunks = _chunks(
+        "Quarterly revenue grew in every region.",
+        "The cat sat on the mat. Cats like mats.",
+        "Dogs and cats are common pets.",
+        "Shipping delays affected the supply chain.",
+    )
+    result = bm25_rank_chunks(chunks, "CAT, mat", top_k=3)
+    assert list(result.indices) == [1, 0, 2]   # then zero-score ties in document order
+    assert result.scores[0] > 0 and not result.scores[1:].any()
+
+
+def test_equal_scores_keep_document_order():
+    chunks = _chunks("alpha beta", "gamma delta", "alpha beta", "alpha beta")
+    result = bm25_rank_chunks(chunks, "alpha", top_k=2)
+    assert list(result.indices) == [0, 2]
+
+
+def test_top_k_larger_than_corpus():
+    chunks = _chunks("one fish", "two fish", "red fish")
+    result = bm25_rank_chunks(chunks, "red", top_k=10)
+    assert len(result) == 3
+    assert result.indices[0] == 2
+
+
+@pytest.mark.parametrize("texts,query", [
+    (("!!!", "---", "..."), "hello"),       # no chunk has a word token
+    (("some words", "more words"), "?!"),   # the query has none
+])
+def test_nothing_to_match_returns_document_order(texts, query):
+    result = bm25_rank_chunks(_chunks(*texts), query, top_k=2)
+    assert list(result.indices) == [0, 1]
+    assert not result.scores.any()
+
+
+def test_index_cache_keyed_by_chunk_texts(monkeypatch):
+    monkeypatch.setattr(rag_pipeline, "_bm25_cache", type(rag_pipeline._bm25_cache)())
+    monkeypatch.setattr(rag_pipeline, "_BM25_CACHE_SIZE", 2)
+
+    first = _bm25_index(_chunks("a b", "c d"))
+    assert _bm25_index(_chunks("a b", "c d")) is first        # equal texts, new Chunk objects
+    assert _bm25_index(_chunks("a b", "c e")) is not first
+    assert _bm25_index(_chunks("a bc", "d")) is not _bm25_index(_chunks("a b", "cd"))
+
+    _bm25_index(_chunks("x", "y"))                             # over size: oldest dropped
+    assert len(rag_pipeline._bm25_cache) == 2
+    assert _bm25_index(_chunks("a b", "c d")) is not first
+
+
+def test_top_k_stable_matches_stable_argsort():
+    rng = np.random.default_rng(0)
+    scores = rng.integers(0, 5, size=200).astype(np.float32)   # many ties
+    for top_k in (0, 1, 7, 199, 200, 500):
+        expected = np.argsort(-scores, kind="stable")[:top_k]
+        np.testing.assert_array_equal(_top_k_stable(scores, top_k), expected)
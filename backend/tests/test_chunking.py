@@ -33,6 +33,15 @@ def test_single_sentence_fits_in_one_chunk():
     assert chunks[0].text == "Short document."
 
 
+def test_chunk_offsets_match_source_text():
+    text = _make_long_text(60)
+    chunks = split_into_chunks(text, target_tokens=80, overlap_tokens=10)
+    for chunk in chunks:
+        span = text[chunk.start_char:chunk.end_char]
+        assert span.startswith(chunk.text.split()[0])
+        assert span.endswith(chunk.text[-20:])
+
+
 def test_trim_boilerplate_removes_page_numbers():
     text = "Introduction\n\nPage 1\n\nSome real content here.\n\nPage 2\n\nMore content."
     trimmed = trim_boilerplate(text)
@@ -47,6 +56,25 @@ def test_trim_boilerplate_collapses_whitespace():
     assert "\n\n\n" not in trimmed
 
 
+def test_trim_boilerplate_collapses_whitespace_only_lines():
+    text = "Para one.\n  \n\t\n   \nPara two.\n-----\nCopyright 2024 Acme\n42\nPara three."
+    trimmed = trim_boilerplate(text)
+    assert trimmed == "Para one.\n\nPara two.\n\nPara three."
+
+
+def test_boilerplate_removal_matches_regex_sub():
+    from app.core.chunking_engine import _BOILERPLATE_COMBINED, _remove_boilerplate
+
+    samples = [
+        "Contents\n \n5\nBody text here.\nPage 3\n",
+        "Intro\n\n  12  \n\n-----\nCopyright 2024 Acme\nindex\t\nEnd",
+        "naïve café\nPage 7\nFooter: ™\n",
+        "",
+    ]
+    for text in samples:
+        assert _remove_boilerplate(text) == _BOILERPLATE_COMBINED.sub("", text)
+
+
 def test_overlap_creates_shared_sentences():
     """With overlap, adjacent chunks should share sentences."""
     text = _make_long_text(60)
@@ -0,0 +1,53 @@
+"""Tests for context assembly helpers."""
+import numpy as np
+import pytest
+
+from app.core import context_assembler
+from app.core.context_assembler import _budget_prefix, _budget_prefix_py
+
+
+@pytest.mark.parametrize("doc_max,expected", [(0, 0), (99, 0), (100, 1), (349, 2), (600, 3), (10**9, 4)])
+def test_budget_prefix(doc_max, expected):
+    counts = np.array([100, 200, 300, 50], dtype=np.int32)
+    assert _budget_prefix(counts, doc_max) == expected
+    assert _budget_prefix_py(counts, doc_max) == expected
+
+
+def test_budget_prefix_without_numba(monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def no_numba(name, *args, **kwargs):
+        if name == "numba":
+            raise ImportError("numba")
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_numba)
+    monkeypatch.setattr(context_assembler, "_budget_prefix_impl", None)
+    assert _budget_prefix(np.array([5, 5, 5], dtype=np.int32), 11) == 2
+    assert context_assembler._budget_prefix_impl is _budget_prefix_py
+
+
+def test_t4_uses_precomputed_query_vec(monkeypatch):
+    pytest.importorskip("faiss")
+    pytest.importorskip("msgpack")
+    from app.core.chunking_engine import Chunk
+    from app.core.rag_pipeline import RAGPipeline
+    from app.core.tier_classifier import Tier, TierResult
+
+    vectors = np.eye(3, 8, dtype=np.float32)
+    template = RAGPipeline(use_openai=False)
+    template._chunks = [Chunk(index=i, text=f"chunk {i}", token_count=5) for i in range(3)]
+    template._dim = 8
+    pipeline = RAGPipeline.from_vectors(vectors, template.serialize_meta())
+
+    def no_embedding(query):
+        raise AssertionError("query embedded twice")
+
+    monkeypatch.setattr(pipeline, "embed_query", no_embedding)
+    ctx = context_assembler.assemble(
+        raw_text="", tier_result=TierResult(tier=Tier.T4, token_count=0, label=""),
+        query="anything", rag_pipeline=pipeline, top_k=1, query_vec=vectors[2:3],
+    )
+    assert ctx.assembled_text == "chunk 2"
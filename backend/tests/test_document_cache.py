@@ -0,0 +1,52 @@
+"""Tests for per-document cache invalidation."""
+import pytest
+
+pytest.importorskip("faiss")
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.api.routes import query
+from app.core.pipeline_cache import RAGPipelineCache
+from app.services import document_cache
+
+from .test_pipeline_cache import ENTRY_BYTES, _pipeline
+
+
+@pytest.fixture
+def caches(tmp_path, monkeypatch):
+    server = fakeredis.FakeServer()
+    client = fakeredis.FakeAsyncRedis(server=server)
+    rag_cache = RAGPipelineCache(max_bytes=10 * ENTRY_BYTES, spill_dir=str(tmp_path))
+    monkeypatch.setattr(document_cache, "async_redis", client)
+    monkeypatch.setattr(document_cache, "rag_cache", rag_cache)
+    monkeypatch.setattr(document_cache, "_tombstones", type(document_cache._tombstones)())
+    monkeypatch.setattr(
+        document_cache, "semantic_cache",
+        lambda: document_cache.SemanticQueryCache(fakeredis.FakeRedis(server=server), threshold=0.9, ttl=60),
+    )
+    return rag_cache, client
+
+
+async def test_invalidate_drops_memory_and_redis(caches):
+    rag_cache, client = caches
+    rag_cache.put("doc", _pipeline(1))
+    await client.set("rag:doc:index", b"index")
+
+    await document_cache.invalidate_document("doc")
+
+    assert "doc" not in rag_cache
+    assert await client.exists("rag:doc:index") == 0
+    assert document_cache.is_deleted("doc")
+    assert not document_cache.is_deleted("other")
+
+
+async def test_query_finishing_after_delete_does_not_recache(caches):
+    rag_cache, client = caches
+    await document_cache.invalidate_document("doc")
+
+    # A T4 query that started before the delete caches its pipeline afterwards
+    rag_cache.put("doc", _pipeline(1))
+    await client.set("rag:doc:meta", b"meta")
+    await query._drop_if_deleted("doc")
+
+    assert "doc" not in rag_cache
+    assert await client.exists("rag:doc:meta") == 0
@@ -0,0 +1,89 @@
+"""Tests for the document endpoints (SQLite-backed)."""
+import os
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+httpx = pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.routes import documents
+from app.db.database import Base, get_db
+from app.db.models import Document
+
+
+@pytest.fixture
+async def api(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with sessions() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    monkeypatch.setattr(
+        documents, "settings", documents.settings.model_copy(update={"upload_dir": str(tmp_path)})
+    )
+    invalidated = []
+
+    async def fake_invalidate(doc_id):
+        # The row must already be gone (committed) when caches are dropped
+        async with sessions() as session:
+            found = await session.get(Document, doc_id)
+        invalidated.append((doc_id, found is None))
+
+    monkeypatch.setattr(documents, "invalidate_document", fake_invalidate)
+
+    app = FastAPI()
+    app.include_router(documents.router, prefix="/api")
+    app.dependency_overrides[get_db] = override_get_db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client, sessions, tmp_path, invalidated
+    await engine.dispose()
+
+
+async def _add_document(sessions, tmp_path, doc_id: str) -> str:
+    file_path = tmp_path / f"{doc_id}_notes.txt"
+    file_path.write_text("Hello world.")
+    (tmp_path / f"{doc_id}.txt").write_text("Hello world.")
+    async with sessions() as session:
+        session.add(Document(
+            id=doc_id, filename="notes.txt", file_size=12, token_count=3,
+            tier=1, tier_label="Direct Injection", mime_type="text/plain",
+            file_path=str(file_path),
+        ))
+        await session.commit()
+    return str(file_path)
+
+
+async def test_delete_document(api):
+    client, sessions, tmp_path, invalidated = api
+    doc_id = "11111111-1111-1111-1111-111111111111"
+    file_path = await _add_document(sessions, tmp_path, doc_id)
+
+    response = await client.delete(f"/api/documents/{doc_id}")
+
+    assert response.status_code == 204
+    assert not os.path.exists(file_path)
+    assert not os.path.exists(documents.parsed_text_path(doc_id))
+    assert invalidated == [(doc_id, True)]
+    async with sessions() as session:
+        assert (await session.execute(select(Document))).first() is None
+    assert (await client.get(f"/api/documents/{doc_id}")).status_code == 404
+
+
+async def test_delete_missing_document(api):
+    client, _, _, invalidated = api
+    response = await client.delete("/api/documents/22222222-2222-2222-2222-222222222222")
+    assert response.status_code == 404
+    assert invalidated == []
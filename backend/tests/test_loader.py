@@ -1,6 +1,6 @@
 """Tests for document loader."""
 import pytest
-from app.core.document_loader import load_document
+from app.core.document_loader import load_document, load_document_path
 
 
 def test_load_plain_text():
@@ -23,6 +23,94 @@ def test_load_latin1_text():
     assert "Caf" in doc.raw_text
 
 
+def test_load_utf8_bom_is_stripped():
+    doc = load_document("\ufeffHello".encode("utf-8"), "bom.txt")
+    assert doc.raw_text == "Hello"
+
+
+def test_load_latin1_after_long_ascii_prefix():
+    tail = "Café déjà vu résumé"
+    content = ("a" * 100_000 + "\n" + tail).encode("latin-1")
+    doc = load_document(content, "file.txt")
+    assert doc.raw_text.endswith(tail)
+
+
+def test_load_cp1251_text():
+    content = "Привет мир, как дела? Это тест."
+    doc = load_document(content.encode("cp1251"), "file.txt")
+    assert doc.raw_text == content
+
+
+def _docx_bytes(body_xml: str) -> bytes:
+    import io
+    import zipfile
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr(
+            "word/document.xml",
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f"<w:body>{body_xml}</w:body></w:document>",
+        )
+    return buf.getvalue()
+
+
+def test_load_docx_paragraphs_and_tables_in_order():
+    body = (
+        "<w:p><w:r><w:t>Intro</w:t><w:tab/><w:t>text</w:t></w:r></w:p>"
+        "<w:p><w:r><w:t xml:space=\"preserve\">  </w:t></w:r></w:p>"
+        "<w:tbl><w:tr>"
+        "<w:tc><w:p><w:r><w:t>a</w:t></w:r></w:p></w:tc>"
+        "<w:tc><w:p/></w:tc>"
+        "<w:tc><w:p><w:hyperlink><w:r><w:t>link</w:t></w:r></w:hyperlink></w:p></w:tc>"
+        "</w:tr></w:tbl>"
+        "<w:p><w:r><w:t>End</w:t><w:br/><w:t>e</w:t><w:noBreakHyphen/><w:t>mail</w:t></w:r></w:p>"
+    )
+    doc = load_document(_docx_bytes(body), "file.docx")
+    assert doc.raw_text == "Intro\ttext\n\na | link\n\nEnd\ne-mail"
+
+
+@pytest.mark.parametrize("filename,content", [
+    ("notes.txt", b"Plain text body."),
+    ("table.csv", b"name,value\na,1\nb,2\n"),
+    ("file.docx", _docx_bytes("<w:p><w:r><w:t>From disk</w:t></w:r></w:p>")),
+])
+def test_load_document_path_matches_bytes(tmp_path, filename, content):
+    path = tmp_path / filename
+    path.write_bytes(content)
+    from_path = load_document_path(str(path), filename)
+    assert from_path == load_document(content, filename)
+
+
+@pytest.mark.parametrize("delimiter", [",", "\t", ";", "|"])
+def test_load_csv_detects_delimiter(delimiter):
+    rows = ["name,city,score", "Ann,Paris,1", "Bob,Oslo,2", "Cy,Rome,3"]
+    content = "\n".join(r.replace(",", delimiter) for r in rows).encode("utf-8")
+    doc = load_document(content, "data.csv")
+    assert doc.row_count == 3
+    assert "Columns: name, city, score" in doc.raw_text
+
+
+def test_load_csv_keeps_last_line_of_short_file():
+    # Two lines, no trailing newline: the header alone would sniff as ","
+    doc = load_document(b"Total, net;Total, gross\n1;2", "data.csv")
+    assert "Columns: Total, net, Total, gross" in doc.raw_text
+    assert doc.raw_text.endswith("1\t2")
+
+
+def test_load_pdf_pages_in_order():
+    fitz = pytest.importorskip("fitz")
+    pdf = fitz.open()
+    for i in range(12):
+        page = pdf.new_page()
+        if i != 5:   # one blank page
+            page.insert_text((72, 72), f"Body of page {i + 1}")
+    doc = load_document(pdf.tobytes(), "file.pdf")
+    assert doc.page_count == 11
+    assert doc.raw_text.startswith("[Page 1]\nBody of page 1")
+    assert "[Page 6]" not in doc.raw_text
+    assert doc.raw_text.index("[Page 7]") < doc.raw_text.index("[Page 12]")
+
+
 def test_unsupported_extension():
     with pytest.raises(ValueError, match="Unsupported file type"):
         load_document(b"data", "file.pptx")
@@ -35,6 +123,13 @@ def test_load_csv():
     assert "Alice" in doc.raw_text
 
 
+def test_load_csv_rows_are_tab_separated():
+    csv_content = "name,age\nAlice,30\nBob,25\n"
+    doc = load_document(csv_content.encode("utf-8"), "data.csv")
+    assert "Alice\t30" in doc.raw_text
+    assert not doc.raw_text.endswith("\n")
+
+
 def test_load_empty_text():
     doc = load_document(b"   ", "empty.txt")
     assert doc.raw_text.strip() == ""
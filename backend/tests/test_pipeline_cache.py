@@ -0,0 +1,95 @@
+"""Tests for the in-process RAG pipeline LRU cache."""
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("msgpack")
+
+from app.core.chunking_engine import Chunk
+from app.core.pipeline_cache import RAGPipelineCache
+from app.core.rag_pipeline import RAGPipeline
+
+DIM = 8
+N_CHUNKS = 4
+ENTRY_BYTES = N_CHUNKS * DIM * 2   # fp16 codes
+
+
+def _pipeline(seed: int) -> RAGPipeline:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((N_CHUNKS, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    template = RAGPipeline(use_openai=False)
+    template._chunks = [Chunk(index=i, text=f"doc {seed} chunk {i}", token_count=5) for i in range(N_CHUNKS)]
+    template._dim = DIM
+    return RAGPipeline.from_vectors(vectors, template.serialize_meta())
+
+
+def test_put_and_get(tmp_path):
+    cache = RAGPipelineCache(max_bytes=10 * ENTRY_BYTES, spill_dir=str(tmp_path))
+    pipeline = _pipeline(1)
+    assert cache.get("a") is None
+    cache.put("a", pipeline)
+    assert cache.get("a") is pipeline
+    assert cache.nbytes == ENTRY_BYTES
+
+
+def test_eviction_spills_least_recently_used(tmp_path):
+    cache = RAGPipelineCache(max_bytes=2 * ENTRY_BYTES, spill_dir=str(tmp_path))
+    first, second, third = _pipeline(1), _pipeline(2), _pipeline(3)
+    cache.put("a", first)
+    cache.put("b", second)
+    cache.get("a")              # "b" becomes least recently used
+    cache.put("c", third)
+
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.nbytes == 2 * ENTRY_BYTES
+    assert (tmp_path / "b.index").exists() and (tmp_path / "b.meta").exists()
+    assert cache.get("b") is None   # memory-only lookup
+
+    reloaded = cache.get_spilled("b")
+    assert [c.text for c in reloaded._chunks] == [c.text for c in second._chunks]
+    np.testing.assert_array_equal(reloaded.embeddings, second.embeddings)
+    assert "b" in cache
+    assert not (tmp_path / "b.index").exists()   # back in memory, spill removed
+
+
+def test_oversized_entry_is_kept(tmp_path):
+    cache = RAGPipelineCache(max_bytes=ENTRY_BYTES // 2, spill_dir=str(tmp_path))
+    cache.put("a", _pipeline(1))
+    assert "a" in cache
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_get_spilled_missing(tmp_path):
+    cache = RAGPipelineCache(max_bytes=ENTRY_BYTES, spill_dir=str(tmp_path))
+    assert cache.get_spilled("missing") is None
+
+
+def test_discard_removes_memory_and_spill(tmp_path):
+    cache = RAGPipelineCache(max_bytes=ENTRY_BYTES, spill_dir=str(tmp_path))
+    cache.put("a", _pipeline(1))
+    cache.put("b", _pipeline(2))   # spills "a"
+    cache.discard("a")
+    cache.discard("b")
+
+    assert len(cache) == 0 and cache.nbytes == 0
+    assert list(tmp_path.iterdir()) == []
+    assert cache.get_spilled("a") is None
+
+
+def test_spill_directory_is_capped(tmp_path):
+    spill_bytes = len(_pipeline(0).serialize()[0])
+    cache = RAGPipelineCache(max_bytes=ENTRY_BYTES, spill_dir=str(tmp_path),
+                             max_spill_bytes=2 * spill_bytes)
+    stale = tmp_path / "stale.index"
+    stale.write_bytes(b"x" * spill_bytes)            # left by an earlier process
+    os.utime(stale, (0, 0))
+    (tmp_path / "stale.meta").write_bytes(b"")
+
+    for i, doc_id in enumerate("abc"):
+        cache.put(doc_id, _pipeline(i))              # spills "a", then "b"
+
+    assert sorted(p.name for p in tmp_path.glob("*.index")) == ["a.index", "b.index"]
+    assert not (tmp_path / "stale.meta").exists()
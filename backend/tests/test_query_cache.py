@@ -0,0 +1,84 @@
+"""Tests for the semantic query cache."""
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.core.query_cache import SemanticQueryCache
+
+
+def _unit(dim: int, seed: int) -> np.ndarray:
+    vec = np.random.default_rng(seed).standard_normal((1, dim)).astype(np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def _near(vec: np.ndarray, noise: float, seed: int) -> np.ndarray:
+    other = vec + noise * np.random.default_rng(seed).standard_normal(vec.shape).astype(np.float32)
+    return other / np.linalg.norm(other)
+
+
+@pytest.fixture
+def cache():
+    return SemanticQueryCache(fakeredis.FakeRedis(), threshold=0.92, ttl=60)
+
+
+def test_hit_above_threshold(cache):
+    vec = _unit(64, 1)
+    cache.store("doc", 5, vec, "answer")
+    assert cache.lookup("doc", 5, vec) == "answer"
+    assert cache.lookup("doc", 5, _near(vec, 0.05, 2)) == "answer"
+
+
+def test_miss_below_threshold(cache):
+    cache.store("doc", 5, _unit(64, 1), "answer")
+    assert cache.lookup("doc", 5, _unit(64, 2)) is None
+
+
+def test_miss_for_other_doc_or_top_k(cache):
+    vec = _unit(64, 1)
+    cache.store("doc", 5, vec, "answer")
+    assert cache.lookup("other", 5, vec) is None
+    assert cache.lookup("doc", 10, vec) is None
+
+
+def test_closest_stored_query_wins(cache):
+    first, second = _unit(64, 1), _unit(64, 2)
+    cache.store("doc", 5, first, "first")
+    cache.store("doc", 5, second, "second")
+    assert cache.lookup("doc", 5, second) == "second"
+    assert cache.lookup("doc", 5, first) == "first"
+
+
+def test_dimensions_are_isolated(cache):
+    # 1536 floats reshape cleanly into three 512-dim rows; keys must keep them apart
+    wide = _unit(1536, 1)
+    cache.store("doc", 5, wide, "wide")
+    narrow = np.ascontiguousarray(wide[:, :512])
+    narrow /= np.linalg.norm(narrow)
+    assert cache.lookup("doc", 5, narrow) is None
+    assert cache.lookup("doc", 5, wide) == "wide"
+
+
+def test_max_entries_cap():
+    cache = SemanticQueryCache(fakeredis.FakeRedis(), threshold=0.92, ttl=60, max_entries=2)
+    vecs = [_unit(32, seed) for seed in range(3)]
+    for i, vec in enumerate(vecs):
+        cache.store("doc", 5, vec, f"answer {i}")
+
+    assert cache.lookup("doc", 5, vecs[0]) == "answer 0"
+    assert cache.lookup("doc", 5, vecs[1]) == "answer 1"
+    assert cache.lookup("doc", 5, vecs[2]) is None
+
+
+def test_invalidate_drops_all_variants(cache):
+    vec = _unit(64, 1)
+    cache.store("doc", 5, vec, "five")
+    cache.store("doc", 10, vec, "ten")
+    cache.store("other", 5, vec, "other")
+
+    cache.invalidate("doc")
+
+    assert cache.lookup("doc", 5, vec) is None
+    assert cache.lookup("doc", 10, vec) is None
+    assert cache.lookup("other", 5, vec) == "other"
@@ -0,0 +1,56 @@
+"""Tests for the query route's semantic-cache embedder handling."""
+import numpy as np
+import pytest
+
+from app.api.routes import query
+from app.core.tier_classifier import Tier
+
+
+class _Embedder:
+    def __init__(self, load_error=None, embed_error=None):
+        self.load_error = load_error
+        self.embed_error = embed_error
+        self.embedder_loaded = False
+
+    def load_embedder(self):
+        if self.load_error is not None:
+            raise self.load_error
+        self.embedder_loaded = True
+
+    def embed_query(self, text):
+        if self.embed_error is not None:
+            raise self.embed_error
+        return np.ones((1, 4), dtype=np.float32)
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    monkeypatch.setattr(query, "_query_embedder_failed", False)
+    monkeypatch.setattr(query, "_SEMANTIC_CACHE_ENABLED", True)
+
+    def install(**errors):
+        monkeypatch.setattr(query, "_query_embedder", _Embedder(**errors))
+
+    return install
+
+
+def test_cache_applies_to_t4_only(embedder):
+    embedder()
+    assert query._semantic_cache_applies(Tier.T4)
+    assert not query._semantic_cache_applies(Tier.T3)
+
+
+def test_load_failure_disables_cache(embedder):
+    embedder(load_error=ImportError("sentence-transformers not installed"))
+    assert query._embed_query("q") is None
+    assert query._query_embedder_failed
+    assert not query._semantic_cache_applies(Tier.T4)
+
+
+def test_transient_failure_skips_one_query(embedder):
+    embedder(embed_error=RuntimeError("429 rate limited"))
+    assert query._embed_query("q") is None
+    assert not query._query_embedder_failed
+
+    query._query_embedder.embed_error = None
+    assert query._embed_query("q").shape == (1, 4)
@@ -0,0 +1,59 @@
+"""Tests for RAGPipeline serialization and embedder restoration."""
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("msgpack")
+
+from app.core.chunking_engine import Chunk
+from app.core.rag_pipeline import RAGPipeline
+
+
+def _meta(use_openai: bool, dim: int, n_chunks: int = 3) -> bytes:
+    template = RAGPipeline(use_openai=use_openai)
+    template._chunks = [Chunk(index=i, text=f"chunk {i}", token_count=5) for i in range(n_chunks)]
+    template._dim = dim
+    return template.serialize_meta()
+
+
+def test_serialize_roundtrip_retrieves_identically():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((20, 64)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    original = RAGPipeline.from_vectors(vectors, _meta(False, 64, n_chunks=20))
+
+    restored = RAGPipeline.deserialize(*original.serialize())
+
+    assert restored._chunks == original._chunks
+    assert restored.embedder_kind == "local" and restored._dim == 64
+    for query_vec in (vectors[3:4], vectors[[17]] + 0.1 * rng.standard_normal((1, 64)).astype(np.float32)):
+        expected = original.retrieve("q", top_k=5, query_vec=query_vec)
+        actual = restored.retrieve("q", top_k=5, query_vec=query_vec)
+        np.testing.assert_array_equal(actual.indices, expected.indices)
+        np.testing.assert_array_equal(actual.scores, expected.scores)
+        assert actual.texts == expected.texts
+    assert expected.indices[0] == 17
+
+
+def test_restored_pipeline_keeps_local_embedder(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    pipeline = RAGPipeline.from_vectors(np.eye(3, 384, dtype=np.float32), _meta(False, 384))
+    assert pipeline.embedder_kind == "local"
+    assert pipeline._model == "all-MiniLM-L6-v2"
+
+
+def test_restored_openai_pipeline_does_not_fall_back(monkeypatch):
+    pipeline = RAGPipeline.from_vectors(np.eye(3, 512, dtype=np.float32), _meta(True, 512))
+    assert pipeline.embedder_kind == "openai"
+    monkeypatch.setitem(sys.modules, "openai", None)   # client unavailable
+    with pytest.raises(RuntimeError, match="text-embedding-3-small"):
+        pipeline.embed_query("q")
+
+
+def test_legacy_meta_infers_embedder_from_dim():
+    msgpack = pytest.importorskip("msgpack")
+    legacy = msgpack.packb({"dim": 384, "use_openai": None, "chunks": [(0, "a", 1, None, 0, 1)]})
+    pipeline = RAGPipeline.from_vectors(np.eye(1, 384, dtype=np.float32), legacy)
+    assert pipeline.embedder_kind == "local"
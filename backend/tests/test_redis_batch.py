@@ -0,0 +1,97 @@
+"""Tests for the coalescing Redis reader."""
+import asyncio
+
+import pytest
+
+from app.utils.redis_batch import CoalescingRedisReader
+
+
+class _StubRedis:
+    """Records MGET calls; values come from a dict."""
+
+    def __init__(self, data=None, error=None):
+        self.data = data or {}
+        self.error = error
+        self.calls: list[list[str]] = []
+
+    async def mget(self, keys):
+        self.calls.append(list(keys))
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return [self.data.get(k) for k in keys]
+
+
+async def test_concurrent_gets_share_one_mget():
+    client = _StubRedis({f"k{i}": f"v{i}".encode() for i in range(10)})
+    reader = CoalescingRedisReader(client, max_wait=0.01)
+
+    values = await asyncio.gather(*(reader.get(f"k{i}") for i in range(10)), reader.get("missing"))
+
+    assert values == [f"v{i}".encode() for i in range(10)] + [None]
+    assert len(client.calls) == 1
+    assert sorted(client.calls[0]) == sorted([f"k{i}" for i in range(10)] + ["missing"])
+
+
+async def test_duplicate_keys_fetched_once():
+    client = _StubRedis({"k": b"v"})
+    reader = CoalescingRedisReader(client, max_wait=0.01)
+
+    values = await asyncio.gather(reader.get("k"), reader.get("k"), reader.get("k"))
+
+    assert values == [b"v", b"v", b"v"]
+    assert client.calls == [["k"]]
+
+
+async def test_max_batch_flushes_before_timeout():
+    client = _StubRedis({"a": b"1", "b": b"2", "c": b"3"})
+    # A max_wait far longer than the test timeout: only the size trigger can flush
+    reader = CoalescingRedisReader(client, max_wait=60, max_batch=2)
+
+    first = await asyncio.wait_for(asyncio.gather(reader.get("a"), reader.get("b")), timeout=1)
+    assert first == [b"1", b"2"]
+    assert client.calls == [["a", "b"]]
+
+    # The next key waits for a new window
+    pending = asyncio.ensure_future(reader.get("c"))
+    await asyncio.sleep(0.01)
+    assert not pending.done()
+    pending.cancel()
+
+
+async def test_mget_error_reaches_every_waiter():
+    client = _StubRedis(error=ConnectionError("redis down"))
+    reader = CoalescingRedisReader(client, max_wait=0.001)
+
+    results = await asyncio.gather(reader.get("a"), reader.get("b"), reader.get("a"),
+                                   return_exceptions=True)
+
+    assert len(results) == 3
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert len(client.calls) == 1
+
+
+async def test_cancelled_waiter_does_not_break_flush():
+    client = _StubRedis({"a": b"1", "b": b"2"})
+    reader = CoalescingRedisReader(client, max_wait=0.01)
+
+    cancelled = asyncio.ensure_future(reader.get("a"))
+    kept_same_key = asyncio.ensure_future(reader.get("a"))
+    kept_other_key = asyncio.ensure_future(reader.get("b"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await kept_same_key == b"1"
+    assert await kept_other_key == b"2"
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert len(client.calls) == 1
+
+
+async def test_with_fakeredis():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis()
+    await client.set("rag:1:index", b"index")
+    reader = CoalescingRedisReader(client, max_wait=0.001)
+
+    assert await asyncio.gather(reader.get("rag:1:index"), reader.get("rag:1:meta")) == [b"index", None]
@@ -1,6 +1,7 @@
 """Tests for tier classification logic."""
 import pytest
-from app.core.tier_classifier import Tier, classify
+from app.core.tier_classifier import Tier, classify, tiering_token_count
+from app.core.token_estimator import count_tokens
 
 
 def test_t1_boundary():
@@ -51,3 +52,19 @@ def test_result_has_color():
 def test_result_has_label():
     result = classify(5_000)
     assert "Direct Injection" in result.label
+
+
+def test_tiering_count_uses_estimate_far_from_boundary():
+    text = "word " * 1_000          # ~1,250 estimated tokens, clearly T1
+    assert tiering_token_count(text) == (len(text) // 4, True)
+
+
+def test_tiering_count_is_exact_near_boundary():
+    text = "lorem ipsum " * 4_000    # ~12,000 estimated tokens, at the T1/T2 line
+    assert tiering_token_count(text) == (count_tokens(text), False)
+
+
+def test_tiering_count_is_exact_for_non_ascii():
+    # 81,000 UTF-8 bytes: bytes // 4 would put this near T2, the real count is far higher
+    text = "文档处理系统测试。" * 3_000
+    assert tiering_token_count(text) == (count_tokens(text), False)
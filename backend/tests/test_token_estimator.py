@@ -25,16 +25,42 @@ def test_batch_matches_individual():
     assert batch == individual
 
 
+def test_batch_handles_edge_texts():
+    texts = ["", " leading", "trailing ", "\n\nx", "naïve résumé", ""]
+    assert count_tokens_batch(texts) == [count_tokens(t) for t in texts]
+    assert count_tokens_batch([]) == []
+
+
+def test_batch_with_literal_separator():
+    texts = ["before <|endoftext|> after", "plain"]
+    assert count_tokens_batch(texts) == [count_tokens(t) for t in texts]
+
+
+def test_batch_with_other_special_token_text():
+    texts = ["x <|endofprompt|> y", "<|fim_prefix|>code<|fim_suffix|>", "plain"]
+    assert count_tokens_batch(texts) == [count_tokens(t) for t in texts]
+
+
+def test_batch_sharded_matches_individual(monkeypatch):
+    from app.core import token_estimator
+
+    monkeypatch.setattr(token_estimator, "_TOKENIZE_THREADS", 4)
+    texts = [f"Sentence {i} about topic {i % 7}." for i in range(3000)]
+    assert count_tokens_batch(texts) == [count_tokens(t) for t in texts]
+
+
 def test_truncate_does_not_exceed_limit():
     text = " ".join(["word"] * 500)
-    truncated = truncate_to_tokens(text, max_tokens=100)
+    truncated, kept = truncate_to_tokens(text, max_tokens=100)
     assert count_tokens(truncated) <= 100
+    assert kept == 100
 
 
 def test_truncate_short_text_unchanged():
     text = "Short text."
-    result = truncate_to_tokens(text, max_tokens=100)
+    result, kept = truncate_to_tokens(text, max_tokens=100)
     assert result == text
+    assert kept == count_tokens(text)
 
 
 def test_estimate_from_bytes_heuristic():